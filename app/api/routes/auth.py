@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, Request, Query
+from fastapi import APIRouter, Depends, Request, Query
 from starlette import status
 
 from app.api.schemas.user import (ResponseUserLogin, RequestUserCreate,
                                   ResponseUserCreate, RequestUserLogin,
                                   ResponseAcceptUser)
 from app.core.exception import responses_err
+from app.core.responses import FastJSONResponse
 from app.services.user_service import AuthUserService
 from app.utils.unitofwork import IUnitOfWork, UnitOfWork
 
@@ -27,7 +28,7 @@ async def get_user_service(
 )
 async def create_user(
         request: Request,
-        user_data: RequestUserCreate, background_tasks: BackgroundTasks,
+        user_data: RequestUserCreate,
         user_service: AuthUserService = Depends(get_user_service)
 ) -> ResponseUserCreate:
     """
@@ -49,8 +50,7 @@ async def create_user(
     ---
     """
     return await user_service.registration(
-        request=request, user_data=user_data,
-        background_tasks=background_tasks
+        request=request, user_data=user_data
     )
 
 
@@ -95,7 +95,7 @@ async def accept_user(
 async def user_login(
         user_data: RequestUserLogin,
         user_service: AuthUserService = Depends(get_user_service)
-) -> ResponseUserLogin:
+) -> FastJSONResponse:
     """
     ## Авторизация пользователя
 
@@ -111,4 +111,6 @@ async def user_login(
     * `token` - многоразовый токен для предоставления доступа к API
     ---
     """
-    return await user_service.login(user_data=user_data)
+    return FastJSONResponse(
+        content=await user_service.login(user_data=user_data)
+    )
@@ -1,40 +1,70 @@
-from typing import Annotated
+from typing import Annotated, Type
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from starlette import status
 
 from app.api.schemas.currency import (ResponseCurrencyList,
                                       RequestCurrencyExchange,
-                                      ResponseCurrencyExchange)
+                                      ResponseCurrencyExchange,
+                                      RequestCurrencyExchangeBatch,
+                                      ResponseCurrencyExchangeBatch)
+from app.core.config import settings
 from app.core.exception import responses_err
+from app.core.negotiation import MsgPackRoute, get_response_class
+from app.core.responses import MSGPACK_MEDIA_TYPE
 from app.core.security import get_current_user
+from app.utils.compression import IDENTITY
 from app.utils.external_api import CurrencyAPI
 
+# Возраст данных стороннего сервиса в секундах
+DATA_AGE_HEADER: str = "X-Data-Age"
+
+# Маршруты принимают и отдают JSON или MessagePack по заголовкам
+# Content-Type и Accept, схемы данных для обоих форматов общие
 currency_router = APIRouter(
-    prefix="/currency", tags=["Currency"],
+    prefix="/currency", tags=["Currency"], route_class=MsgPackRoute,
     responses={
+        status.HTTP_200_OK: {"content": {MSGPACK_MEDIA_TYPE: {}}},
         **responses_err.service_unavailable_entity(),
         **responses_err.unauthorized_entity()
     }
 )
 
 
-async def get_currency_service() -> CurrencyAPI:
+async def get_currency_service(request: Request) -> CurrencyAPI:
+    """
+    Создает и возвращает экземпляр сервиса конвертации валют с общим
+    для приложения поставщиком курсов.
+    """
+    return CurrencyAPI(provider=request.app.state.rate_provider)
+
+
+def set_age_header(response: Response, age: float) -> None:
     """
-    Создает и возвращает экземпляр сервиса конвертации валют.
+    Указывает в заголовке `X-Data-Age` сколько секунд назад были получены
+    данные от стороннего сервиса. Стандартный `Age` не используется: он
+    означает время хранения ответа в HTTP кэше, и с ним кэши считали бы
+    свежий ответ устаревшим.
     """
-    return CurrencyAPI()
+    response.headers[DATA_AGE_HEADER] = str(int(age))
 
 
 @currency_router.get(
     path="/list/", response_model=ResponseCurrencyList,
     status_code=status.HTTP_200_OK,
-    responses={**responses_err.bad_request_entity()}
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "Список не изменился с ETag из If-None-Match"
+        },
+        **responses_err.bad_request_entity()
+    }
 )
 async def currency_list(
+        request: Request,
         _: Annotated[str, Depends(get_current_user)],
+        response_class: Type[Response] = Depends(get_response_class),
         currency_service: CurrencyAPI = Depends(get_currency_service)
-) -> ResponseCurrencyList:
+) -> Response:
     """
     ## Получить список валют
 
@@ -44,9 +74,39 @@ async def currency_list(
     #### Возвращает следующие параметры:
     * `symbols` - перечисление объектов содержащих кодировку
         валюты и его расшифровку
+
+    #### Заголовок `X-Data-Age` содержит возраст данных в секундах
+
+    #### Тело ответа в JSON и MessagePack сериализуется и сжимается
+        (`br`, `gzip`) один раз на каждый новый список. Запрос
+        с `If-None-Match`, совпадающим с `ETag` текущего списка, получает
+        ответ `304` без тела
     ---
     """
-    return await currency_service.get_currency_list()
+    body = await currency_service.get_currency_list_body(
+        media_type=response_class.media_type
+    )
+    encoding = body.negotiate(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": body.etags[encoding],
+        "Cache-Control": (
+            f"private, max-age={settings.CURRENCY_LIST_CLIENT_MAX_AGE}"
+        ),
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if body.matches(request.headers.get("if-none-match")):
+        response = Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+        )
+    else:
+        if encoding != IDENTITY:
+            headers["Content-Encoding"] = encoding
+        response = Response(
+            content=body.variants[encoding], headers=headers,
+            media_type=body.media_type,
+        )
+    set_age_header(response=response, age=currency_service.cache.age)
+    return response
 
 
 @currency_router.post(
@@ -56,13 +116,14 @@ async def currency_list(
 async def currency_exchange(
         currency_data: RequestCurrencyExchange,
         _: Annotated[str, Depends(get_current_user)],
+        response_class: Type[Response] = Depends(get_response_class),
         currency_service: CurrencyAPI = Depends(get_currency_service)
-) -> ResponseCurrencyExchange:
+) -> Response:
     """
     ## Конвертация валюты
 
-    Получение свежих обменных курсов для различных валют из открытого
-    API обменных курсов
+    Конвертация по кросс-курсу через базовую валюту из снимка свежих
+    обменных курсов, полученного из открытого API обменных курсов
     ---
     #### Принимает на вход следующие параметры:
     * `from_currency` - какую валюту нужно преобразовать
@@ -79,6 +140,51 @@ async def currency_exchange(
     * `amount` - количество валюты
 
     * `result` - результат преобразования
+
+    * `rate` - примененный курс обмена
+
+    * `timestamp` - время снимка курсов, по которому выполнен расчет
+
+    #### Заголовок `X-Data-Age` содержит возраст снимка курсов в секундах
+    ---
+    """
+    result = await currency_service.convert_currency(data=currency_data)
+    response = response_class(content=result)
+    set_age_header(response=response, age=currency_service.rates.age)
+    return response
+
+
+@currency_router.post(
+    path="/exchange/batch/", response_model=ResponseCurrencyExchangeBatch,
+    status_code=status.HTTP_200_OK,
+)
+async def currency_exchange_batch(
+        currency_data: RequestCurrencyExchangeBatch,
+        _: Annotated[str, Depends(get_current_user)],
+        response_class: Type[Response] = Depends(get_response_class),
+        currency_service: CurrencyAPI = Depends(get_currency_service)
+) -> Response:
+    """
+    ## Пакетная конвертация валюты
+
+    Конвертация множества сумм и пар валют за один запрос по одному
+    снимку обменных курсов
+    ---
+    #### Принимает на вход следующие параметры:
+    * `items` - список конвертаций, каждая из которых содержит
+        `from_currency`, `to_currency` и `amount`
+
+    #### Возвращает следующие параметры:
+    * `timestamp` - время снимка курсов, по которому выполнен расчет
+
+    * `items` - результаты в том же порядке, что и в запросе. Для каждого
+        элемента указаны `result` и `rate`, либо `error`, если одна из
+        валют не поддерживается
+
+    #### Заголовок `X-Data-Age` содержит возраст снимка курсов в секундах
     ---
     """
-    return await currency_service.convert_currency(data=currency_data)
+    result = await currency_service.convert_currency_batch(data=currency_data)
+    response = response_class(content=result)
+    set_age_header(response=response, age=currency_service.rates.age)
+    return response
@@ -0,0 +1,44 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Response
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from starlette import status
+
+from app.core.config import settings
+from app.core.exception import credentials_token_err
+from app.core.metrics import render_metrics
+
+metrics_router = APIRouter(tags=["Metrics"])
+metrics_bearer = HTTPBearer(auto_error=False)
+
+
+async def check_metrics_token(
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(
+            metrics_bearer
+        )
+) -> None:
+    """
+    Пропускает запрос только с токеном `METRICS_TOKEN` в заголовке
+    `Authorization: Bearer ...`.
+    """
+    expected = settings.METRICS_TOKEN.get_secret_value().encode()
+    if credentials is None or not hmac.compare_digest(
+            credentials.credentials.encode(), expected
+    ):
+        raise credentials_token_err
+
+
+@metrics_router.get(
+    path="/metrics", status_code=status.HTTP_200_OK,
+    include_in_schema=False, dependencies=[Depends(check_metrics_token)]
+)
+async def metrics() -> Response:
+    """
+    ## Метрики приложения в текстовом формате Prometheus
+
+    При нескольких воркерах значения суммируются по всем процессам.
+    Доступны только с токеном `METRICS_TOKEN`.
+    """
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
@@ -1,5 +1,9 @@
+from datetime import datetime
+
 from pydantic import BaseModel, Field
-from typing import Dict
+from typing import Dict, List, Optional
+
+from app.core.config import settings
 
 
 class ResponseCurrencyList(BaseModel):
@@ -18,3 +22,24 @@ class RequestCurrencyExchange(BaseModel):
 
 class ResponseCurrencyExchange(RequestCurrencyExchange):
     result: float = 1
+    rate: float = 1
+    timestamp: datetime
+    stale: bool = False
+
+
+class RequestCurrencyExchangeBatch(BaseModel):
+    items: List[RequestCurrencyExchange] = Field(
+        min_length=1, max_length=settings.CURRENCY_BATCH_MAX_SIZE
+    )
+
+
+class ResponseCurrencyExchangeBatchItem(RequestCurrencyExchange):
+    result: Optional[float] = None
+    rate: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ResponseCurrencyExchangeBatch(BaseModel):
+    timestamp: datetime
+    stale: bool = False
+    items: List[ResponseCurrencyExchangeBatchItem]
@@ -1,9 +1,12 @@
 from pathlib import Path
+from typing import TYPE_CHECKING, Literal
 
-from fastapi_mail import ConnectionConfig
 from pydantic import Field, EmailStr, SecretStr
 from pydantic_settings import BaseSettings
 
+if TYPE_CHECKING:
+    from fastapi_mail import ConnectionConfig
+
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 API_TITLE = """API currency convert"""
@@ -26,22 +29,181 @@ class Settings(BaseSettings):
     """
     # Настройки FastAPI
     DEBUG: bool = Field(default=False, description="True or False")
+    OPENAPI_ENABLED: bool = Field(
+        default=True,
+        description="Serve /openapi.json, /docs and /redoc - True or False"
+    )
+    METRICS_TOKEN: SecretStr | None = Field(
+        default=None,
+        description="Bearer token for /metrics, unset - /metrics is off"
+    )
     ALLOWED_HOSTS: str = Field(default="localhost 127.0.0.1")
     SECRET_KEY: str = Field(description='Secret key')
 
+    # Настройки логирования
+    LOG_ROTATION: Literal["size", "time"] = Field(
+        default="size", description="Log file rotation - size or time"
+    )
+    LOG_MAX_BYTES: int = Field(
+        default=10 * 1024 * 1024, description="Log file size to rotate"
+    )
+    LOG_ROTATION_WHEN: str = Field(
+        default="midnight", description="Log file time to rotate"
+    )
+    LOG_BACKUP_COUNT: int = Field(
+        default=5, description="Rotated log files to keep"
+    )
+    LOG_JSON: bool = Field(
+        default=False, description="Write logs as JSON - True or False"
+    )
+
     # Подключение к БД
     DB_USER: str = Field(description='Database username')
     DB_PASS: str = Field(description='Database password')
     DB_HOST: str = Field(description='Database host')
     DB_PORT: str = Field(description='Database port')
     DB_NAME: str = Field(description='Database name')
+    DATABASE_URL: str | None = Field(
+        default=None,
+        description="SQLAlchemy async URL used instead of the DB_* settings"
+    )
+    DB_POOL_SIZE: int = Field(
+        default=10, ge=1,
+        description="Persistent connections in the pool of each worker"
+    )
+    DB_MAX_OVERFLOW: int = Field(
+        default=5, ge=0,
+        description="Extra connections a worker may open above the pool size"
+    )
+    DB_POOL_TIMEOUT: float = Field(
+        default=10.0, gt=0,
+        description="Seconds to wait for a free connection from the pool"
+    )
+    DB_POOL_RECYCLE: int = Field(
+        default=1800,
+        description="Reconnect connections older than N seconds (-1 - never)"
+    )
+    DB_POOL_PRE_PING: bool = Field(
+        default=False,
+        description="Check connections with a ping on checkout - True or False"
+    )
+    DB_STATEMENT_CACHE_SIZE: int = Field(
+        default=100, ge=0,
+        description="Prepared statements cached per connection (0 - off)"
+    )
 
     # Токен APILayer
     CURRENCY_DATA_API: str = Field(description='TOKEN APILAYER')
 
+    # Поставщик курсов валют
+    CURRENCY_PROVIDER: Literal["apilayer", "mock"] = Field(
+        default="apilayer", description="Rates provider - apilayer or mock"
+    )
+    MOCK_PROVIDER_URL: str = Field(
+        default="http://127.0.0.1:8001", description="Mock provider server URL"
+    )
+    MOCK_PROVIDER_LATENCY: float = Field(
+        default=0.1, description="Mock provider mean response latency (sec)"
+    )
+    MOCK_PROVIDER_ERROR_RATE: float = Field(
+        default=0.0, ge=0, le=1, description="Mock provider share of errors"
+    )
+    MOCK_PROVIDER_CURRENCIES: str = Field(
+        default=(
+            "USD EUR RUB GBP JPY CNY CHF CAD AUD KZT TRY INR BRL MXN KRW"
+            + " SEK NOK DKK PLN CZK SGD HKD"
+        ),
+        description="Mock provider currency codes separated by spaces"
+    )
+
+    # Настройки HTTP клиента для поставщика курсов
+    CURRENCY_API_POOL_SIZE: int = Field(
+        default=100, description="Max connections in HTTP pool"
+    )
+    CURRENCY_API_KEEPALIVE: int = Field(
+        default=20, description="Max keep-alive connections in HTTP pool"
+    )
+    CURRENCY_API_KEEPALIVE_EXPIRY: float = Field(
+        default=30.0, description="Idle keep-alive connection time-life (sec)"
+    )
+    CURRENCY_API_CONNECT_TIMEOUT: float = Field(
+        default=5.0, description="Connect timeout to APILayer (sec)"
+    )
+    CURRENCY_API_READ_TIMEOUT: float = Field(
+        default=10.0, description="Read timeout from APILayer (sec)"
+    )
+    CURRENCY_API_DEADLINE: float = Field(
+        default=8.0, description="Deadline for APILayer call with retries"
+    )
+    CURRENCY_API_RETRIES: int = Field(
+        default=2, description="Max retries of failed APILayer call"
+    )
+    CURRENCY_API_BACKOFF: float = Field(
+        default=0.2, description="Initial delay between retries (sec)"
+    )
+    CURRENCY_API_BREAKER_THRESHOLD: int = Field(
+        default=5, description="Failures in a row to open circuit breaker"
+    )
+    CURRENCY_API_BREAKER_RESET: float = Field(
+        default=30.0, description="Time before circuit breaker probe (sec)"
+    )
+    CURRENCY_LIST_CACHE_TTL: float = Field(
+        default=3600.0, description="Currency list cache time-life (sec)"
+    )
+    CURRENCY_LIST_CLIENT_MAX_AGE: int = Field(
+        default=0, ge=0,
+        description="Cache-Control max-age of the currency list for clients"
+    )
+    CURRENCY_BASE: str = Field(
+        default="USD", description="Base currency of the quotes snapshot"
+    )
+    CURRENCY_RATES_CACHE_TTL: float = Field(
+        default=60.0, description="Quotes snapshot cache time-life (sec)"
+    )
+    CURRENCY_MAX_STALE: float = Field(
+        default=600.0,
+        description="How long expired cache may be served while refreshing"
+    )
+    CURRENCY_REFRESH_ENABLED: bool = Field(
+        default=True, description="Refresh rates in background - True or False"
+    )
+    CURRENCY_REFRESH_INTERVAL: float = Field(
+        default=30.0, description="Background rates refresh interval (sec)"
+    )
+    CURRENCY_REFRESH_JITTER: float = Field(
+        default=5.0, description="Max random delay added to interval (sec)"
+    )
+    CURRENCY_SNAPSHOT_PATH: str | None = Field(
+        default=None,
+        description="Rates snapshot file shared by workers and restarts"
+    )
+    CURRENCY_SNAPSHOT_POLL_INTERVAL: float = Field(
+        default=1.0, description="How often workers check snapshot file (sec)"
+    )
+    CURRENCY_BATCH_MAX_SIZE: int = Field(
+        default=50_000, description="Max conversions in one batch request"
+    )
+
     # Настройки JWT
     ALGORITHM: str = Field(description='JWT crypto algorithm')
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(description='JWT time-life')
+    TOKEN_CACHE_SIZE: int = Field(
+        default=10_000, description="Max verified JWT kept in memory"
+    )
+
+    # Пул для хеширования паролей
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = Field(
+        default="thread", description="bcrypt pool type - thread or process"
+    )
+    PASSWORD_HASH_WORKERS: int = Field(
+        default=2, ge=1, description="bcrypt pool workers per app worker"
+    )
+    PASSWORD_HASH_QUEUE_SIZE: int = Field(
+        default=32, ge=0, description="Max bcrypt tasks waiting for worker"
+    )
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = Field(
+        default=5.0, description="Max wait for a place in bcrypt queue (sec)"
+    )
 
     # Настройки почтового агента
     SMTP_USER: EmailStr = Field(description="Email username")
@@ -54,26 +216,63 @@ class Settings(BaseSettings):
     MAIL_STARTTLS: bool = False
     MAIL_USE_CREDENTIALS: bool = True
     MAIL_VALIDATE_CERTS: bool = True
-    MAIL_CONF: ConnectionConfig | None = None
+    MAIL_WORKERS: int = Field(
+        default=2, ge=1,
+        description="SMTP connections kept open by the outbox worker"
+    )
 
-    def __init__(self, **data):
-        super().__init__(**data)
-        self.MAIL_CONF = self.get_connect_email_sender()
+    # Воркер исходящих писем
+    OUTBOX_BATCH_SIZE: int = Field(
+        default=50, ge=1, description="Emails claimed from the outbox at once"
+    )
+    OUTBOX_POLL_INTERVAL: float = Field(
+        default=1.0, gt=0,
+        description="Seconds to wait when the outbox has no due emails"
+    )
+    OUTBOX_LEASE: float = Field(
+        default=120.0, gt=0,
+        description="Seconds a claimed email is hidden from other workers"
+    )
+    OUTBOX_MAX_ATTEMPTS: int = Field(
+        default=8, ge=1,
+        description="Attempts before an email is marked as failed"
+    )
+    OUTBOX_BACKOFF: float = Field(
+        default=5.0, gt=0, description="Delay before the first retry"
+    )
+    OUTBOX_BACKOFF_MAX: float = Field(
+        default=3600.0, gt=0, description="Max delay between retries"
+    )
+    OUTBOX_METRICS_PORT: int | None = Field(
+        default=None, description="Port for /metrics of the outbox worker"
+    )
 
     @property
     def get_async_database_url(self) -> str:
-        """Получение URL-адреса для асинхронного подключения к Postgres"""
+        """
+        Получение URL-адреса для асинхронного подключения к Postgres.
+        Если задан `DATABASE_URL`, используется он, например
+        `sqlite+aiosqlite:///bench.db` для нагрузочных тестов.
+        """
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return (
             f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}"
             + f"@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
         )
 
-    def get_connect_email_sender(self):
+    def get_connect_email_sender(self) -> "ConnectionConfig":
         """
         Использует параметры, заданные в классе Settings, для создания
         объекта ConnectionConfig, который определяет настройки подключения к
         почтовому серверу.
+
+        Вызывается процессом, который отправляет письма. `fastapi_mail`
+        импортируется здесь, чтобы не замедлять запуск веб-приложения,
+        которое писем не отправляет.
         """
+        from fastapi_mail import ConnectionConfig
+
         return ConnectionConfig(
             MAIL_USERNAME=str(self.SMTP_USER),
             MAIL_PASSWORD=self.SMTP_PASSWORD,
@@ -32,6 +32,14 @@ credentials_not_token_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
     detail="Не были предоставлены данные для доступа"
 )
+service_overloaded = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Сервер перегружен, попробуйте позже"
+)
+upstream_service_unavailable = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Сервис в данный момент недоступен"
+)
 
 
 class GlobalTypeError(BaseModel):
@@ -1,11 +1,22 @@
+import atexit
+import json
 import logging
 import logging.config
+import logging.handlers
 import os
+import queue
+from typing import Optional, Tuple
 
 from uvicorn import logging as uvicorn_logging
 
 from app.core.config import BASE_DIR, settings
 
+# Без fcntl (Windows) все процессы пишут в файл нулевого слота
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 LOG_LEVEL: str = "DEBUG" if settings.DEBUG else "INFO"
 FORMAT_UVICORN: str = (
     "%(levelprefix)s %(asctime)s" + " - %(filename)s - %(message)s"
@@ -14,36 +25,155 @@ FORMAT_SIMPLE: str = (
     "%(asctime)s - %(levelname)s" + " - %(filename)s - %(message)s"
 )
 FORMAT_DATE: str = "%Y-%m-%d %H:%M:%S"
-LOG_FILE: str = "info.log"
-LOG_FILE: str = os.path.join(BASE_DIR, "logs", LOG_FILE)
+LOGS_DIR: str = os.path.join(BASE_DIR, "logs")
+# Каждый процесс uvicorn пишет в файл своего слота, чтобы воркеры
+# не делили один файл при ротации
+LOG_FILE: str = "info.{slot}.log"
+LOG_SLOT_LOCK: str = ".info.{slot}.lock"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+# Слот процесса: pid, номер слота и дескриптор файла блокировки
+_slot: Optional[Tuple[int, int, Optional[int]]] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирование записей лога в одну строку JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record, FORMAT_DATE),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "line": record.lineno,
+            "process": record.process,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    Помещает запись в очередь без форматирования.
+
+    Стандартный `QueueHandler` форматирует сообщение в вызывающем потоке,
+    чтобы запись можно было передать в другой процесс. Очередь здесь
+    общая с потоком внутри того же процесса, поэтому форматирование
+    целиком переносится в поток `QueueListener`.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def claim_log_slot() -> int:
+    """
+    Номер файла лога процесса — наименьший слот, не занятый другим
+    работающим процессом. Слот удерживается блокировкой `flock` на файле
+    `.info.<slot>.lock` до завершения процесса. Перезапущенный воркер
+    продолжает файлы освободившегося слота, поэтому число файлов в
+    каталоге ограничено числом одновременно работающих процессов,
+    а не растет с каждым перезапуском.
+    """
+    global _slot
+    pid = os.getpid()
+    # Процесс, созданный через fork, наследует блокировку родителя
+    if _slot is not None and _slot[0] == pid:
+        return _slot[1]
+    if fcntl is None:
+        _slot = (pid, 0, None)
+        return 0
+    slot = 0
+    while True:
+        fd = os.open(
+            os.path.join(LOGS_DIR, LOG_SLOT_LOCK.format(slot=slot)),
+            os.O_RDWR | os.O_CREAT, 0o644,
+        )
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            slot += 1
+            continue
+        _slot = (pid, slot, fd)
+        return slot
+
+
+def get_file_handler() -> logging.Handler:
+    """Файловый обработчик с ротацией по размеру или по времени."""
+    filename = os.path.join(LOGS_DIR, LOG_FILE.format(slot=claim_log_slot()))
+    if settings.LOG_ROTATION == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            filename=filename, when=settings.LOG_ROTATION_WHEN,
+            backupCount=settings.LOG_BACKUP_COUNT, encoding="utf-8",
+        )
+    return logging.handlers.RotatingFileHandler(
+        filename=filename, maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT, encoding="utf-8",
+    )
+
+
+def stop_loggers() -> None:
+    """Дописывает оставшиеся в очереди записи и останавливает поток."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
 
 def init_loggers() -> logging.Logger:
-    """Инициализация параметров логирования."""
-    logs_dir = os.path.join(BASE_DIR, "logs")
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
+    """
+    Инициализация параметров логирования.
+
+    Обработчик корневого логгера только помещает записи в очередь, а
+    форматирование и запись в консоль и файл выполняет отдельный поток
+    `QueueListener`, поэтому вызовы логгера не блокируют цикл событий
+    на дисковых операциях.
+    """
+    global _listener
+    if not os.path.exists(LOGS_DIR):
+        os.makedirs(LOGS_DIR)
 
     logger: logging.Logger = logging.getLogger()
     logger.setLevel(level=LOG_LEVEL)
 
-    console_formatter: uvicorn_logging.DefaultFormatter = (
-        uvicorn_logging.DefaultFormatter(
+    if settings.LOG_JSON:
+        console_formatter: logging.Formatter = JsonFormatter()
+        file_formatter: logging.Formatter = JsonFormatter()
+    else:
+        console_formatter = uvicorn_logging.DefaultFormatter(
             fmt=FORMAT_UVICORN, datefmt=FORMAT_DATE
         )
-    )
+        file_formatter = logging.Formatter(
+            fmt=FORMAT_SIMPLE, datefmt=FORMAT_DATE
+        )
     console_handler: logging.StreamHandler = logging.StreamHandler()
     console_handler.setFormatter(fmt=console_formatter)
     console_handler.setLevel(level=LOG_LEVEL)
 
-    file_formatter: logging.Formatter = logging.Formatter(
-        fmt=FORMAT_SIMPLE, datefmt=FORMAT_DATE
-    )
-    file_handler: logging.FileHandler = logging.FileHandler(filename=LOG_FILE)
+    file_handler: logging.Handler = get_file_handler()
     file_handler.setFormatter(fmt=file_formatter)
     file_handler.setLevel(level=LOG_LEVEL)
 
-    logger.addHandler(hdlr=console_handler)
-    logger.addHandler(hdlr=file_handler)
+    # Повторная инициализация заменяет прежний конвейер, а не дублирует его
+    stop_loggers()
+    for handler in list(logger.handlers):
+        if isinstance(handler, LocalQueueHandler):
+            logger.removeHandler(handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(hdlr=LocalQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler,
+        respect_handler_level=True,
+    )
+    _listener.start()
 
     return logger
+
+
+atexit.register(stop_loggers)
@@ -0,0 +1,269 @@
+"""
+Метрики приложения в формате Prometheus.
+
+При запуске нескольких воркеров uvicorn каждый процесс пишет значения
+в файлы каталога из переменной окружения `PROMETHEUS_MULTIPROC_DIR`,
+а `/metrics` собирает их в общую сумму по всем процессам. Без этой
+переменной метрики хранятся в памяти процесса.
+"""
+import os
+import time
+from typing import Tuple
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess,
+                               start_http_server)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MULTIPROC_DIR_ENV: str = "PROMETHEUS_MULTIPROC_DIR"
+
+# Границы корзин для быстрых операций: запросы к БД, получение
+# соединения из пула
+FAST_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5,
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP запроса",
+    ["method", "route", "status"],
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Время одного запроса к поставщику курсов валют",
+    ["provider", "operation"],
+)
+UPSTREAM_ERRORS = Counter(
+    "upstream_errors_total",
+    "Ошибки запросов к поставщику курсов валют",
+    ["provider", "operation", "reason"],
+)
+UPSTREAM_POLICY_FAILURES = Counter(
+    "upstream_policy_failures_total",
+    "Вызовы поставщика, прерванные дедлайном или предохранителем",
+    ["reason"],
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Выполненные и объединенные вызовы поставщика курсов",
+    ["outcome"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Обращения к кэшам в памяти процесса",
+    ["cache", "result"],
+)
+DB_CONNECTION_ACQUIRE = Histogram(
+    "db_connection_acquire_seconds",
+    "Время получения соединения с БД для сессии",
+    buckets=FAST_BUCKETS,
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Время выполнения запроса к БД",
+    ["operation"],
+    buckets=FAST_BUCKETS,
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Число постоянных соединений в пуле БД",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Число соединений БД, выданных из пула",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Число соединений БД сверх размера пула на момент последней выдачи",
+    multiprocess_mode="livesum",
+)
+MAIL_SEND_LATENCY = Histogram(
+    "mail_send_duration_seconds",
+    "Время отправки одного письма через SMTP",
+)
+MAIL_SENT = Counter(
+    "mail_sent_total",
+    "Отправленные и не отправленные письма",
+    ["result"],
+)
+MAIL_OUTBOX_PENDING = Gauge(
+    "mail_outbox_pending",
+    "Число писем, ожидающих отправки в таблице email_outbox",
+    multiprocess_mode="livemax",
+)
+EXECUTOR_RUN = Histogram(
+    "executor_run_seconds",
+    "Время выполнения задачи в пуле",
+    ["executor"],
+)
+EXECUTOR_WAIT = Histogram(
+    "executor_wait_seconds",
+    "Время ожидания задачи в очереди пула",
+    ["executor"],
+)
+EXECUTOR_REJECTED = Counter(
+    "executor_rejected_total",
+    "Задачи, отклоненные из-за переполненной очереди пула",
+    ["executor"],
+)
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "executor_queue_depth",
+    "Число задач, ожидающих свободного исполнителя",
+    ["executor"],
+    multiprocess_mode="livesum",
+)
+STARTUP_DURATION = Gauge(
+    "app_startup_seconds",
+    "Длительность этапов запуска процесса приложения",
+    ["phase"],
+    multiprocess_mode="liveall",
+)
+
+
+def is_multiprocess() -> bool:
+    """Включен ли сбор метрик нескольких процессов через файлы."""
+    return bool(os.environ.get(MULTIPROC_DIR_ENV))
+
+
+def get_registry() -> CollectorRegistry:
+    """Реестр, из которого отдаются метрики с учетом режима процессов."""
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Возвращает текст метрик и его тип содержимого."""
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int) -> None:
+    """
+    Отдает метрики по HTTP на порту `port` из фонового потока. Для
+    процессов без собственного веб-приложения, например воркеров.
+    """
+    start_http_server(port, registry=get_registry())
+
+
+def mark_process_dead() -> None:
+    """
+    Удаляет значения метрик-индикаторов текущего процесса при его
+    остановке, чтобы они не попадали в сумму по живым процессам.
+    """
+    if is_multiprocess():
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """
+    ### Измеряет время обработки HTTP запросов.
+
+    Метка `route` — шаблон пути найденного маршрута (`/api/currency/list/`),
+    а не фактический путь запроса, поэтому число рядов метрики ограничено
+    числом маршрутов. Запросы, не дошедшие до маршрута, учитываются
+    с меткой `unmatched`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                getattr(route, "path_format", "unmatched"),
+                status_code,
+            ).observe(time.perf_counter() - started)
+
+
+def _before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+) -> None:
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+) -> None:
+    operation = statement.lstrip().split(None, 1)[0].upper()
+    DB_QUERY_LATENCY.labels(operation).observe(
+        time.perf_counter() - context._query_started
+    )
+
+
+def _after_transaction_create(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info["acquire_started"] = time.perf_counter()
+
+
+def _after_begin(session, transaction, connection) -> None:
+    started = session.info.pop("acquire_started", None)
+    if started is not None:
+        DB_CONNECTION_ACQUIRE.observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Подключает к движку SQLAlchemy измерение времени запросов и занятости
+    пула, а к сессиям — измерение времени получения соединения из пула.
+
+    Транзакция сессии создается при первом запросе, а соединение
+    выдается ей сразу после этого, поэтому разница между событиями
+    `after_transaction_create` и `after_begin` — время ожидания пула
+    вместе с установкой нового соединения.
+    """
+    sync_engine = engine.sync_engine
+    if event.contains(
+            sync_engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+    pool = sync_engine.pool
+    if isinstance(pool, QueuePool):
+        DB_POOL_SIZE.set(pool.size())
+
+        def pool_checkout(dbapi_connection, connection_record, proxy):
+            DB_POOL_CHECKED_OUT.inc()
+            DB_POOL_OVERFLOW.set(max(0, pool.overflow()))
+
+        def pool_checkin(dbapi_connection, connection_record):
+            DB_POOL_CHECKED_OUT.dec()
+
+        event.listen(pool, "checkout", pool_checkout)
+        event.listen(pool, "checkin", pool_checkin)
+
+    if not event.contains(
+            Session, "after_transaction_create", _after_transaction_create
+    ):
+        event.listen(
+            Session, "after_transaction_create", _after_transaction_create
+        )
+        event.listen(Session, "after_begin", _after_begin)
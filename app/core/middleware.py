@@ -1,41 +1,75 @@
 import logging
 
-from fastapi import HTTPException, Request
+from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 from starlette import status
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
 
 logger = logging.getLogger()
 
 
-class ExceptionHandlerMiddleware(BaseHTTPMiddleware):
+class ExceptionHandlerMiddleware:
     """
-    ### Общая обработка исключений, вывод заголовков входящего запроса,
-        а также вывод подробностей серверной ошибки при включенном DEBUG
+    ### Общая обработка исключений, вывод заголовков входящего запроса
+        при включенном DEBUG логировании, а также вывод подробностей
+        серверной ошибки при включенном DEBUG.
+
+    Реализован как чистое ASGI middleware: в отличие от `BaseHTTPMiddleware`
+    не создает отдельную задачу и поток тела ответа на каждый запрос
+    и не мешает потоковым ответам. Необработанная ошибка сервера при
+    выключенном DEBUG пишется в лог и превращается в ответ 500 без
+    подробностей. Это происходит здесь, а не в обработчике исключений
+    приложения: Starlette вызывает такой обработчик снаружи всех
+    middleware, и ответ 500 остался бы без заголовков CORS.
     """
 
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Request headers:\n%s", dict(Headers(scope=scope))
+            )
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            logger.debug(f"Request headers:\n{dict(request.headers)}")
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_wrapper)
         except HTTPException as http_exc:
-            return JSONResponse(
+            if response_started:
+                raise
+            response = JSONResponse(
                 status_code=http_exc.status_code,
                 content={
                     "status": http_exc.status_code,
                     "detail": http_exc.detail,
                 },
             )
-        except Exception as exc:
-            if not settings.DEBUG:
-                return JSONResponse(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    content={
-                        "status": "error",
-                        "detail": "Internal Server Error",
-                    },
-                )
-            raise exc
+            await response(scope, receive, send)
+        except Exception:
+            if response_started or settings.DEBUG:
+                raise
+            logger.exception("Unhandled server error")
+            response = JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={
+                    "status": "error",
+                    "detail": "Internal Server Error",
+                },
+            )
+            await response(scope, receive, send)
+
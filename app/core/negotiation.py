@@ -0,0 +1,129 @@
+"""
+Выбор формата тела запроса и ответа: JSON или MessagePack.
+
+JSON остается форматом по умолчанию. MessagePack используется, если
+клиент передал тело с `Content-Type: application/msgpack` или указал
+этот тип в `Accept` с весом не ниже, чем у JSON.
+"""
+from typing import Any, Callable, Coroutine, Dict, Optional, Type
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.core.responses import (MSGPACK_MEDIA_TYPE, FastJSONResponse,
+                                MsgPackResponse)
+
+# Типы, под которыми клиенты передают MessagePack
+MSGPACK_MEDIA_TYPES = frozenset(
+    (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+)
+# Типы из Accept, которые допускают ответ в JSON
+JSON_MEDIA_RANGES = frozenset(("application/json", "application/*", "*/*"))
+
+
+def parse_quality_values(header: Optional[str]) -> Dict[str, float]:
+    """
+    Веса значений из заголовков вида `Accept` и `Accept-Encoding`:
+    `application/msgpack, application/json;q=0.5`.
+    """
+    weights: Dict[str, float] = {}
+    if not header:
+        return weights
+    for item in header.split(","):
+        value, _, params = item.strip().partition(";")
+        value = value.strip().lower()
+        if not value:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, quality = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(quality)
+                except ValueError:
+                    weight = 0.0
+        weights[value] = max(weight, weights.get(value, 0.0))
+    return weights
+
+
+def is_msgpack(content_type: Optional[str]) -> bool:
+    """Передано ли тело запроса в MessagePack."""
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in MSGPACK_MEDIA_TYPES
+
+
+def negotiate_response_class(accept: Optional[str]) -> Type[Response]:
+    """
+    Класс ответа по заголовку `Accept`. MessagePack выбирается, только
+    если клиент явно указал его с весом не ниже, чем у JSON.
+    """
+    if not accept or "msgpack" not in accept:
+        return FastJSONResponse
+    weights = parse_quality_values(accept)
+    msgpack_weight = max(
+        weights.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES
+    )
+    json_weight = max(
+        weights.get(media_type, 0.0) for media_type in JSON_MEDIA_RANGES
+    )
+    if msgpack_weight > 0 and msgpack_weight >= json_weight:
+        return MsgPackResponse
+    return FastJSONResponse
+
+
+async def get_response_class(request: Request) -> Type[Response]:
+    """
+    Зависимость, возвращающая класс ответа по заголовку `Accept`.
+    Маршрут создает ответ этим классом из своей модели.
+    """
+    return negotiate_response_class(request.headers.get("accept"))
+
+
+class MsgPackRequest(Request):
+    """
+    Запрос с телом в MessagePack.
+
+    FastAPI получает тело для проверки схемой через `json()`, но только
+    для запросов с JSON в `Content-Type`. Поэтому маршруту запрос
+    передается с `Content-Type: application/json`, а `json()` декодирует
+    MessagePack. Ошибка декодирования приводит к ответу 400, как и
+    любая ошибка разбора тела в FastAPI.
+    """
+
+    @classmethod
+    def from_request(cls, request: Request) -> "MsgPackRequest":
+        headers = [
+            (name, value) for name, value in request.scope["headers"]
+            if name != b"content-type"
+        ]
+        headers.append((b"content-type", b"application/json"))
+        return cls({**request.scope, "headers": headers}, request.receive)
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = msgpack.unpackb(await self.body())
+        return self._json
+
+
+class MsgPackRoute(APIRoute):
+    """
+    ### Маршрут, принимающий тело запроса в JSON или MessagePack.
+
+    Тело в MessagePack проверяется теми же схемами, что и JSON. Формат
+    ответа маршрут выбирает сам через зависимость `get_response_class`.
+    """
+
+    def get_route_handler(
+            self
+    ) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            if is_msgpack(request.headers.get("content-type")):
+                request = MsgPackRequest.from_request(request)
+            return await handler(request)
+
+        return route_handler
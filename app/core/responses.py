@@ -0,0 +1,47 @@
+from typing import Any
+
+import msgpack
+import pydantic_core
+from fastapi.responses import JSONResponse, Response
+
+MSGPACK_MEDIA_TYPE: str = "application/msgpack"
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    ### JSON ответ, сериализуемый pydantic-core сразу в байты.
+
+    Используется как `default_response_class` приложения. Модель,
+    переданная в `content` напрямую, сериализуется своим
+    `__pydantic_serializer__` без промежуточного словаря, поэтому
+    частые маршруты возвращают этот ответ сами, минуя
+    `serialize_response` FastAPI. Словари и списки от остальных
+    маршрутов также сериализуются pydantic-core вместо модуля `json`.
+
+    Результат совпадает с `JSONResponse`: компактный JSON в UTF-8,
+    `NaN` и бесконечности записываются как `null`, как и при
+    сериализации моделей FastAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content, inf_nan_mode="null")
+
+
+def to_msgpack(content: Any) -> bytes:
+    """
+    Сериализует модель или данные в MessagePack. Значения приводятся
+    к тем же типам, что и в JSON (дата и время — строкой ISO 8601),
+    чтобы схема ответа не зависела от формата.
+    """
+    return msgpack.packb(
+        pydantic_core.to_jsonable_python(content, inf_nan_mode="null")
+    )
+
+
+class MsgPackResponse(Response):
+    """### Ответ в формате MessagePack для тех же моделей, что и JSON."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return to_msgpack(content)
@@ -14,6 +14,8 @@ from app.api.schemas.user import TokenData
 from app.core.config import settings
 from app.core.exception import (credentials_token_err,
                                 credentials_not_token_exception)
+from app.utils.cache import token_cache
+from app.utils.executor import hashing_executor
 
 security = HTTPBearer(auto_error=False)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -33,9 +35,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def get_password_hash_async(password: str) -> str:
+    """
+    Хэширует пароль в пуле `hashing_executor`, не блокируя цикл событий.
+    """
+    return await hashing_executor.run(get_password_hash, password)
+
+
+async def verify_password_async(
+        plain_password: str, hashed_password: str
+) -> bool:
+    """
+    Проверяет пароль в пуле `hashing_executor`, не блокируя цикл событий.
+    """
+    return await hashing_executor.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
 def generate_verification_token(user_id: int) -> str:
     """
-    Генерация токена для подтверждения email.
+    Генерация токена для подтверждения email. Токен подписывает `id`
+    пользователя, поэтому его длина не зависит от длины email.
     """
     serializer = URLSafeTimedSerializer(settings.SECRET_KEY)
     return serializer.dumps(user_id)
@@ -45,7 +66,7 @@ def verify_verification_token(
         token: str, max_age: int = 3600
 ) -> Optional[int]:
     """
-    Проверка токена для подтверждения email.
+    Проверка токена для подтверждения email. Возвращает `id` пользователя.
     """
     serializer = URLSafeTimedSerializer(settings.SECRET_KEY)
     try:
@@ -93,6 +114,9 @@ async def get_current_user(
     """
     Зависимость, которая проверяет JWT-токен и возвращает его полезную
     нагрузку. Если токен невалиден, выбрасывает исключение 401.
+
+    Уже проверенные токены берутся из кэша до истечения их срока `exp`
+    без повторной проверки подписи.
     """
     if not credentials:
         raise credentials_not_token_exception
@@ -103,6 +127,10 @@ async def get_current_user(
         )
 
     token = credentials.credentials
+    token_data = token_cache.get(token=token)
+    if token_data is not None:
+        return token_data
+
     payload = await decode_access_token(token=token)
     try:
         if not payload:
@@ -113,4 +141,9 @@ async def get_current_user(
     except PyJWTError:
         raise credentials_token_err
 
-    return TokenData(email=email, user_id=user_id)
+    token_data = TokenData(email=email, user_id=user_id)
+    if payload.get("exp") is not None:
+        token_cache.set(
+            token=token, token_data=token_data, expires_at=payload["exp"]
+        )
+    return token_data
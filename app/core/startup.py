@@ -0,0 +1,72 @@
+"""
+Замер времени запуска процесса приложения.
+
+Этапы создания приложения и его ресурсов измеряются по отдельности,
+а итог считается от запуска процесса, поэтому в него входит и время
+импорта модулей. Результат пишется в лог одной строкой и отдается
+метрикой `app_startup_seconds`.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from app.core.metrics import STARTUP_DURATION
+
+logger = logging.getLogger()
+
+TOTAL_PHASE: str = "total"
+
+
+def process_uptime() -> Optional[float]:
+    """
+    Секунды с момента запуска текущего процесса по `/proc/self/stat`.
+    Возвращает `None`, если время запуска узнать не удалось.
+    """
+    try:
+        with open("/proc/self/stat", "rb") as file:
+            stat = file.read()
+        # Имя процесса в скобках может содержать пробелы, поэтому поля
+        # отсчитываются от закрывающей скобки; starttime — 22-е поле
+        fields = stat[stat.rindex(b")") + 2:].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimer:
+    """
+    ### Собирает длительность этапов запуска.
+
+    Этап оборачивается в `phase`, а `report` вызывается, когда
+    приложение готово принимать запросы.
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def report(self) -> None:
+        """Пишет этапы в лог и выставляет их значения в метрику."""
+        for name, duration in self.phases.items():
+            STARTUP_DURATION.labels(name).set(duration)
+        total = process_uptime()
+        if total is not None:
+            STARTUP_DURATION.labels(TOTAL_PHASE).set(total)
+        logger.info(
+            "Приложение запущено за %s мс: %s",
+            "?" if total is None else f"{total * 1000:.0f}",
+            ", ".join(
+                f"{name}={duration * 1000:.1f}"
+                for name, duration in self.phases.items()
+            ),
+        )
@@ -14,7 +14,7 @@ sys.path.append(os.path.dirname(os.path.dirname(
 
 from app.core.config import settings
 from app.db.database import Base
-from app.db.models import User
+from app.db.models import EmailOutbox, User
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,40 @@
+"""email outbox
+
+Revision ID: 8f2d4c1a9e57
+Revises: 3bb7fc0fd691
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2d4c1a9e57'
+down_revision: Union[str, None] = '3bb7fc0fd691'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('email_outbox',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('recipient', sa.String(length=255), nullable=False),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('next_attempt_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_email_outbox_pending', 'email_outbox', ['next_attempt_at'], unique=False, postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_pending', table_name='email_outbox', postgresql_where=sa.text("status = 'pending'"))
+    op.drop_table('email_outbox')
@@ -1,17 +1,85 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession
+from typing import Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
-
-engine = create_async_engine(settings.get_async_database_url)
-async_session_maker = async_sessionmaker(engine, class_=AsyncSession)
+engine: Optional[AsyncEngine] = None
+# Фабрики сессий привязываются к движку в init_engine при запуске
+# приложения
+async_session_maker = async_sessionmaker(class_=AsyncSession)
+# Сессии этой фабрики открывают транзакции только для чтения
+# (BEGIN READ ONLY в Postgres)
+async_read_only_session_maker = async_sessionmaker(class_=AsyncSession)
 
 
 class Base(DeclarativeBase):
     pass
 
 
+def create_engine() -> AsyncEngine:
+    """
+    Создает асинхронный движок БД с параметрами пула соединений и кэша
+    подготовленных запросов asyncpg из настроек. Размер пула задается на
+    один воркер: всего к Postgres может быть открыто
+    `workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)` соединений.
+
+    Параметры asyncpg передаются только ему: при `DATABASE_URL` с другим
+    драйвером (aiosqlite в нагрузочных тестах) они не поддерживаются.
+    Класс пула указан явно, так как для файла SQLite по умолчанию
+    выбирается пул, не хранящий соединения.
+    """
+    url = make_url(settings.get_async_database_url)
+    connect_args = {}
+    if url.get_driver_name() == "asyncpg":
+        # Первый параметр — кэш диалекта SQLAlchemy, второй — собственный
+        # кэш asyncpg для запросов, выполняемых в обход диалекта
+        connect_args["prepared_statement_cache_size"] = (
+            settings.DB_STATEMENT_CACHE_SIZE
+        )
+        connect_args["statement_cache_size"] = (
+            settings.DB_STATEMENT_CACHE_SIZE
+        )
+    return create_async_engine(
+        url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+def init_engine() -> AsyncEngine:
+    """Создает движок БД процесса и привязывает к нему фабрики сессий."""
+    global engine
+    if engine is None:
+        engine = create_engine()
+        instrument_engine(engine)
+        async_session_maker.configure(bind=engine)
+        async_read_only_session_maker.configure(
+            bind=engine.execution_options(postgresql_readonly=True)
+        )
+    return engine
+
+
+async def dispose_engine() -> None:
+    """Закрывает все соединения пула и отвязывает фабрики сессий."""
+    global engine
+    if engine is not None:
+        await engine.dispose()
+        async_session_maker.configure(bind=None)
+        async_read_only_session_maker.configure(bind=None)
+        engine = None
+
+
 async def get_async_session():
     async with async_session_maker() as session:
         yield session
@@ -1,18 +1,26 @@
 import datetime
 
 from pydantic import EmailStr
-from sqlalchemy import BigInteger, DateTime, func, String
+from sqlalchemy import (BigInteger, DateTime, func, Index, Integer, String,
+                        Text)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.database import Base
 
 
+# В SQLite автоинкремент есть только у INTEGER PRIMARY KEY, поэтому для
+# нее BIGINT ключи создаются как INTEGER
+BigIntegerKey = BigInteger().with_variant(Integer, "sqlite")
+
+
 class User(Base):
     """Модель пользователя."""
 
     __tablename__ = "users"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(
+        BigIntegerKey, primary_key=True, index=True
+    )
     email: Mapped[EmailStr] = mapped_column(
         String(255), unique=True, nullable=False
     )
@@ -27,3 +35,46 @@ class User(Base):
     data_register: Mapped[datetime.datetime] = mapped_column(
         DateTime, nullable=False, server_default=func.now()
     )
+
+
+class EmailOutbox(Base):
+    """
+    Исходящее письмо.
+
+    Запись добавляется в одной транзакции с изменением, ради которого
+    отправляется письмо, и доставляется отдельным процессом
+    `app.workers.outbox`.
+    """
+
+    __tablename__ = "email_outbox"
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    id: Mapped[int] = mapped_column(BigIntegerKey, primary_key=True)
+    recipient: Mapped[str] = mapped_column(String(255), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(20), nullable=False, default=PENDING
+    )
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    next_attempt_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now()
+    )
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now()
+    )
+    sent_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, nullable=True
+    )
+
+    __table_args__ = (
+        # Воркер выбирает только ожидающие письма, поэтому индекс частичный
+        Index(
+            "ix_email_outbox_pending", "next_attempt_at",
+            postgresql_where=(status == PENDING),
+        ),
+    )
@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import Any, Optional, Dict, Sequence
 
-from sqlalchemy import select, insert
+from sqlalchemy import ColumnElement, Row, select, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -21,6 +22,26 @@ class AbstractRepository(ABC):
         """Добавляет одну запись в хранилище данных."""
         raise NotImplementedError
 
+    @abstractmethod
+    async def add_many(self, data: Sequence[Dict[str, Any]]) -> None:
+        """Добавляет несколько записей в хранилище данных."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def upsert(
+            self, data: Dict[str, Any], conflict_columns: Sequence[str],
+            update_columns: Optional[Sequence[str]] = None,
+            where: Optional[ColumnElement[bool]] = None,
+            returning: Optional[Sequence[Any]] = None
+    ) -> Optional[Row]:
+        """Добавляет запись или обновляет существующую."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_many(self, data: Sequence[Dict[str, Any]]) -> None:
+        """Обновляет несколько записей по первичному ключу."""
+        raise NotImplementedError
+
     @abstractmethod
     async def find_all(self) -> Sequence[Any]:
         """Возвращает все записи из хранилища данных."""
@@ -51,6 +72,56 @@ class Repository(AbstractRepository):
         res = await self.session.execute(stmt)
         return res.scalar_one()
 
+    async def add_many(self, data: Sequence[Dict[str, Any]]) -> None:
+        """
+        Добавляет несколько записей. SQLAlchemy объединяет строки
+        в многострочные INSERT ... VALUES, поэтому число обращений к БД
+        не растет с числом записей.
+        """
+        if data:
+            await self.session.execute(insert(self.model), data)
+
+    async def upsert(
+            self, data: Dict[str, Any], conflict_columns: Sequence[str],
+            update_columns: Optional[Sequence[str]] = None,
+            where: Optional[ColumnElement[bool]] = None,
+            returning: Optional[Sequence[Any]] = None
+    ) -> Optional[Row]:
+        """
+        Добавляет запись одним запросом INSERT ... ON CONFLICT DO UPDATE.
+
+        При конфликте по `conflict_columns` обновляет `update_columns`
+        (по умолчанию все переданные, кроме столбцов конфликта), если
+        существующая запись удовлетворяет условию `where`. Возвращает
+        столбцы `returning` (по умолчанию первичный ключ) или None, если
+        запись не была ни добавлена, ни обновлена.
+        """
+        dialect = self.session.get_bind().dialect.name
+        insert_func = (
+            sqlite.insert if dialect == "sqlite" else postgresql.insert
+        )
+        stmt = insert_func(self.model).values(**data)
+        if update_columns is None:
+            update_columns = [
+                column for column in data if column not in conflict_columns
+            ]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={column: stmt.excluded[column] for column in update_columns},
+            where=where,
+        ).returning(*(returning or self.model.__mapper__.primary_key))
+        result = await self.session.execute(stmt)
+        return result.one_or_none()
+
+    async def update_many(self, data: Sequence[Dict[str, Any]]) -> None:
+        """
+        Обновляет несколько записей по первичному ключу одним пакетом
+        (executemany UPDATE). Каждый словарь должен содержать первичный
+        ключ и новые значения.
+        """
+        if data:
+            await self.session.execute(update(self.model), data)
+
     async def find_all(self) -> Sequence[Any]:
         """Возвращает все записи из базы данных."""
         result = await self.session.execute(select(self.model))
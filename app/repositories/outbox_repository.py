@@ -0,0 +1,85 @@
+from datetime import timedelta
+from typing import Any, Dict, Sequence
+
+from sqlalchemy import Interval, Row, bindparam, func, select, update
+
+from app.db.models import EmailOutbox
+from app.repositories.base_repository import Repository
+
+
+class OutboxRepository(Repository):
+    """
+    Репозиторий для работы с исходящими письмами.
+    """
+
+    model = EmailOutbox
+
+    async def enqueue(self, recipient: str, subject: str, body: str) -> None:
+        """Добавляет письмо в очередь на отправку."""
+        await self.add_many([
+            {"recipient": recipient, "subject": subject, "body": body}
+        ])
+
+    async def claim(self, limit: int, lease: float) -> Sequence[Row]:
+        """
+        Забирает до `limit` писем, время отправки которых наступило.
+
+        Строки выбираются с `FOR UPDATE SKIP LOCKED`, поэтому несколько
+        воркеров не получат одно и то же письмо. Выбранным письмам
+        увеличивается счетчик попыток, а следующая попытка откладывается
+        на `lease` секунд: если воркер завершится, не записав результат,
+        письмо снова станет доступно после истечения этого времени.
+        """
+        due = select(self.model.id).where(
+            self.model.status == EmailOutbox.PENDING,
+            self.model.next_attempt_at <= func.now(),
+        ).order_by(self.model.next_attempt_at).limit(limit).with_for_update(
+            skip_locked=True
+        ).scalar_subquery()
+        table = self.model.__table__
+        stmt = update(table).where(table.c.id.in_(due)).values(
+            attempts=table.c.attempts + 1,
+            next_attempt_at=func.now() + timedelta(seconds=lease),
+        ).returning(
+            table.c.id, table.c.recipient, table.c.subject, table.c.body,
+            table.c.attempts,
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def mark_sent(self, ids: Sequence[int]) -> None:
+        """Отмечает письма отправленными."""
+        if not ids:
+            return
+        table = self.model.__table__
+        stmt = update(table).where(table.c.id.in_(ids)).values(
+            status=EmailOutbox.SENT, sent_at=func.now(), last_error=None
+        )
+        await self.session.execute(stmt)
+
+    async def mark_failed(self, failures: Sequence[Dict[str, Any]]) -> None:
+        """
+        Записывает неудачные попытки одним пакетом. Каждый элемент
+        содержит `row_id`, `new_status`, `error` и `delay` — через сколько
+        секунд повторить отправку.
+        """
+        if not failures:
+            return
+        table = self.model.__table__
+        stmt = update(table).where(table.c.id == bindparam("row_id")).values(
+            status=bindparam("new_status"),
+            last_error=bindparam("error"),
+            next_attempt_at=func.now() + bindparam("delay", type_=Interval()),
+        )
+        await self.session.execute(stmt, [
+            {**failure, "delay": timedelta(seconds=failure["delay"])}
+            for failure in failures
+        ])
+
+    async def count_pending(self) -> int:
+        """Число писем, ожидающих отправки."""
+        stmt = select(func.count()).select_from(self.model).where(
+            self.model.status == EmailOutbox.PENDING
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
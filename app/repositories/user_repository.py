@@ -1,6 +1,6 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-from sqlalchemy import update
+from sqlalchemy import Row, update
 
 from app.db.models import User
 from app.repositories.base_repository import Repository
@@ -19,3 +19,26 @@ class UserRepository(Repository):
             self.model.id == user_id
         ).values(**data)
         await self.session.execute(stmt)
+
+    async def register(self, data: Dict[str, Any]) -> Optional[Row]:
+        """
+        Добавляет пользователя или перезаписывает данные неподтвержденного
+        пользователя с тем же email одним запросом. Возвращает строку
+        с `id` или None, если email уже подтвержден.
+        """
+        return await self.upsert(
+            data=data, conflict_columns=["email"],
+            where=self.model.verified.is_(False),
+        )
+
+    async def set_verified(self, **filters) -> Optional[Row]:
+        """
+        Помечает пользователя, найденного по `filters`, подтвержденным
+        одним запросом и возвращает его `id` и `email`. Возвращает None,
+        если пользователь не найден или уже был подтвержден.
+        """
+        stmt = update(self.model).filter_by(**filters).where(
+            self.model.verified.is_(False)
+        ).values(verified=True).returning(self.model.id, self.model.email)
+        result = await self.session.execute(stmt)
+        return result.one_or_none()
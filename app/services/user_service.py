@@ -1,23 +1,20 @@
-from os import path
-
-from fastapi import BackgroundTasks, Request
-from fastapi_mail import MessageSchema, MessageType, FastMail
-from pydantic import EmailStr
+from fastapi import Request
 from starlette.datastructures import URL
 
 from app.api.schemas.user import (RequestUserCreate, ResponseUserCreate,
                                   RequestUserLogin, ResponseUserLogin,
                                   ResponseAcceptUser)
-from app.core.config import settings, BASE_DIR
 from app.core.exception import (credentials_auth_email_already,
                                 credentials_wrong_key_accept,
                                 credentials_refresh_user_accepted,
                                 credentials_not_found_user_with_email,
                                 credentials_wrong_password)
-from app.core.security import (get_password_hash, verify_password,
+from app.core.security import (get_password_hash_async,
+                               verify_password_async,
                                create_access_token,
                                generate_verification_token,
                                verify_verification_token)
+from app.utils.templates import load_template
 from app.utils.unitofwork import IUnitOfWork
 
 
@@ -30,39 +27,40 @@ class AuthUserService:
         self.uow = uow
 
     async def registration(
-            self, request: Request, user_data: RequestUserCreate,
-            background_tasks: BackgroundTasks
+            self, request: Request, user_data: RequestUserCreate
     ) -> ResponseUserCreate:
-        """Регистрация пользователя"""
+        """
+        Регистрация пользователя.
+
+        Пароль хешируется до открытия транзакции, а пользователь
+        добавляется (или перезаписывается, если email еще не подтвержден)
+        одним запросом INSERT ... ON CONFLICT, который возвращает `id`.
+        Токен подтверждения подписывает этот `id` и в БД не сохраняется:
+        при подтверждении проверяется только подпись. Письмо подтверждения
+        записывается в `email_outbox` в той же транзакции и отправляется
+        воркером `app.workers.outbox`.
+        """
+        user_data.password = await get_password_hash_async(
+            password=user_data.password
+        )
+        user_dict = user_data.model_dump()
+
         async with self.uow:
-            user = await self.uow.user.get_one(email=user_data.email)
-            if user and user.verified:
+            user = await self.uow.user.register(user_dict)
+            if user is None:
                 raise credentials_auth_email_already
-
-            user_data.password = get_password_hash(password=user_data.password)
-            user_dict = user_data.model_dump()
-
-            if user and not user.verified:
-                verification_token = generate_verification_token(
-                    user_id=user.id
-                )
-                user_dict["verification_token"] = verification_token
-                await self.uow.user.update_one(user.id, user_dict)
-            else:
-                user_from_db = await self.uow.user.add_one(user_dict)
-                verification_token = generate_verification_token(
-                    user_id=user_from_db.id
-                )
-                await self.uow.user.update_one(
-                    user_id=user_from_db.id,
-                    data={"verification_token": verification_token}
-                )
+            verification_token = generate_verification_token(
+                user_id=user.id
+            )
+            await self.uow.outbox.enqueue(
+                recipient=user_data.email,
+                subject="Подтвердите регистрацию на Currency Exchange",
+                body=render_mail_confirm(
+                    request.base_url, verification_token
+                ),
+            )
             await self.uow.commit()
 
-        background_tasks.add_task(
-            send_mail_confirm,
-            request.base_url, user_data.email, verification_token
-        )
         return ResponseUserCreate(
             message=(f"Мы отправили письмо по адресу {user_data.email}"
                      + " Нажмите на ссылку внутри, чтобы начать.")
@@ -75,53 +73,48 @@ class AuthUserService:
             raise credentials_wrong_key_accept
 
         async with self.uow:
-            user = await self.uow.user.get_one(id=user_id)
-            if user.verified:
+            # Проверка и подтверждение выполняются одним UPDATE, отдельный
+            # поиск нужен только чтобы объяснить отказ
+            user = await self.uow.user.set_verified(id=user_id)
+            if user is None:
+                if await self.uow.user.get_one(id=user_id) is None:
+                    raise credentials_wrong_key_accept
                 raise credentials_refresh_user_accepted
-            token = await create_access_token(
-                data={"email": user.email, "user_id": user.id}
-            )
-            await self.uow.user.update_one(
-                user_id = user_id, data = {"verified": True}
-            )
             await self.uow.commit()
-            return ResponseAcceptUser(token=token)
+
+        token = await create_access_token(
+            data={"email": user.email, "user_id": user.id}
+        )
+        return ResponseAcceptUser(token=token)
 
     async def login(self, user_data: RequestUserLogin) -> ResponseUserLogin:
-        """Вход пользователя в систему."""
-        async with self.uow:
+        """
+        Вход пользователя в систему.
+
+        Поиск пользователя выполняется в транзакции только для чтения,
+        а пароль проверяется уже после возврата соединения в пул, чтобы
+        соединение не простаивало на время хеширования.
+        """
+        async with self.uow(read_only=True):
             user = await self.uow.user.get_one(email=user_data.email)
-            if not user:
-                raise credentials_not_found_user_with_email
-            if not verify_password(user_data.password, user.password):
-                raise credentials_wrong_password
-            token = await create_access_token(
-                data={"email": user.email, "user_id": user.id}
-            )
-            await self.uow.commit()
-            return ResponseUserLogin(token=token)
+        if not user:
+            raise credentials_not_found_user_with_email
+        if not await verify_password_async(
+                user_data.password, user.password
+        ):
+            raise credentials_wrong_password
+        token = await create_access_token(
+            data={"email": user.email, "user_id": user.id}
+        )
+        return ResponseUserLogin(token=token)
 
 
-async def send_mail_confirm(
-    base_url: URL, email: EmailStr, verification_token: str
-) -> None:
-    """Отправка пользователю сообщения подтверждения регистрации."""
+def render_mail_confirm(base_url: URL, verification_token: str) -> str:
+    """Текст письма подтверждения регистрации."""
     url_confirm = (
         f'{base_url}api/auth/register-confirm/?'
         + f'key={verification_token}'
     )
-
-    template_path = path.join(BASE_DIR, 'template/register_confirm.html')
-    with open(template_path, "r", encoding="utf-8") as file:
-        html_template = file.read()
-    html = html_template.format(url_confirm=url_confirm)
-
-    message = MessageSchema(
-        subject="Подтвердите регистрацию на Currency Exchange",
-        recipients=[email],
-        body=html,
-        subtype=MessageType.html,
-        bcc=[]
+    return load_template('register_confirm.html').format(
+        url_confirm=url_confirm
     )
-    fm = FastMail(settings.MAIL_CONF)
-    await fm.send_message(message)
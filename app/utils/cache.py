@@ -0,0 +1,193 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Generic, Optional, Tuple, TypeVar
+
+from app.api.schemas.currency import ResponseCurrencyList
+from app.api.schemas.user import TokenData
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+from app.utils.compression import PrecompressedBody, build_bodies
+from app.utils.rates import RatesSnapshot
+
+T = TypeVar("T")
+
+
+class TTLCache(Generic[T]):
+    """
+    Кэш одного значения в памяти процесса с ограниченным временем жизни.
+
+    Обращения учитываются в метрике `cache_requests_total` с меткой
+    `cache=name`: `hit` — свежее значение, `stale` — устаревшее, но еще
+    допустимое по `max_stale`, `miss` — значения нет.
+    """
+
+    def __init__(self, ttl: float, name: str):
+        """Инициализирует пустой кэш с временем жизни записи `ttl`."""
+        self.ttl = ttl
+        self.name = name
+        self._value: Optional[T] = None
+        self._updated_at: float = 0.0
+        self._hits = CACHE_REQUESTS.labels(name, "hit")
+        self._stale_hits = CACHE_REQUESTS.labels(name, "stale")
+        self._misses = CACHE_REQUESTS.labels(name, "miss")
+
+    def get(self, max_stale: float = 0.0) -> Optional[T]:
+        """
+        Возвращает значение или None, если кэш пуст или значение старше
+        `ttl + max_stale` секунд.
+        """
+        if self._value is not None:
+            age = self.age
+            if age < self.ttl:
+                self._hits.inc()
+                return self._value
+            if age < self.ttl + max_stale:
+                self._stale_hits.inc()
+                return self._value
+        self._misses.inc()
+        return None
+
+    def set(self, value: T, age: float = 0.0) -> None:
+        """
+        Сохраняет значение и отсчитывает время жизни записи так, будто
+        она получена `age` секунд назад.
+        """
+        self._value = value
+        self._updated_at = time.monotonic() - age
+
+    def invalidate(self) -> None:
+        """Принудительно помечает кэш устаревшим."""
+        self._value = None
+        self._updated_at = 0.0
+
+    @property
+    def value(self) -> Optional[T]:
+        """Последнее сохраненное значение без учета возраста и метрик."""
+        return self._value
+
+    @property
+    def expired(self) -> bool:
+        """Истекло ли время жизни значения."""
+        return self.age >= self.ttl
+
+    @property
+    def age(self) -> float:
+        """Возраст значения в секундах (бесконечность, если кэш пуст)."""
+        if self._value is None:
+            return float("inf")
+        return time.monotonic() - self._updated_at
+
+
+class CurrencyListCache(TTLCache[ResponseCurrencyList]):
+    """
+    Кэш списка поддерживаемых валют.
+
+    Помимо самого `ResponseCurrencyList` хранит множество кодов валют
+    для проверки за O(1) и готовые сжатые тела ответа в JSON
+    и MessagePack с ETag, которые строятся один раз на каждое новое
+    значение.
+    """
+
+    def __init__(self, ttl: float, name: str):
+        super().__init__(ttl=ttl, name=name)
+        self._symbols: FrozenSet[str] = frozenset()
+        self._bodies: Dict[str, PrecompressedBody] = {}
+
+    def set(self, value: ResponseCurrencyList, age: float = 0.0) -> None:
+        super().set(value, age=age)
+        self._symbols = frozenset(value.currencies)
+        self._bodies = build_bodies(value)
+
+    def invalidate(self) -> None:
+        super().invalidate()
+        self._symbols = frozenset()
+        self._bodies = {}
+
+    @property
+    def symbols(self) -> FrozenSet[str]:
+        """Множество кодов валют из последнего сохраненного списка."""
+        return self._symbols
+
+    def body(self, media_type: str) -> Optional[PrecompressedBody]:
+        """
+        Сжатое тело ответа с типом `media_type` для последнего
+        сохраненного списка.
+        """
+        return self._bodies.get(media_type)
+
+
+class TokenCache:
+    """
+    Ограниченный LRU-кэш проверенных JWT-токенов.
+
+    Ключ — SHA-256 от токена, поэтому сами токены в памяти не хранятся.
+    Запись живет до момента `exp` из полезной нагрузки токена, после чего
+    токен снова проходит полную проверку подписи.
+    """
+
+    def __init__(self, max_size: int, name: str = "token"):
+        """Инициализирует пустой кэш не более чем на `max_size` токенов."""
+        self.max_size = max_size
+        self.name = name
+        self._entries: OrderedDict[bytes, Tuple[float, TokenData]] = (
+            OrderedDict()
+        )
+        self.hits: int = 0
+        self.misses: int = 0
+        self._hits_metric = CACHE_REQUESTS.labels(name, "hit")
+        self._misses_metric = CACHE_REQUESTS.labels(name, "miss")
+
+    def get(self, token: str) -> Optional[TokenData]:
+        """Возвращает данные ранее проверенного и не истекшего токена."""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, token_data = entry
+            if time.time() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._hits_metric.inc()
+                return token_data
+            del self._entries[key]
+        self.misses += 1
+        self._misses_metric.inc()
+        return None
+
+    def set(
+            self, token: str, token_data: TokenData, expires_at: float
+    ) -> None:
+        """Сохраняет данные проверенного токена до момента `expires_at`."""
+        if self.max_size <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (expires_at, token_data)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Удаляет все записи из кэша."""
+        self._entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий и промахов кэша."""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+
+currency_list_cache = CurrencyListCache(
+    ttl=settings.CURRENCY_LIST_CACHE_TTL, name="currency_list"
+)
+rates_cache: TTLCache[RatesSnapshot] = TTLCache(
+    ttl=settings.CURRENCY_RATES_CACHE_TTL, name="rates"
+)
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_SIZE)
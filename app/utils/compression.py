@@ -0,0 +1,111 @@
+"""
+Заранее сжатые тела ответов с сильным ETag.
+
+Для редко меняющихся ответов тело сериализуется и сжимается один раз
+при обновлении данных, а обработчик запроса только выбирает вариант по
+`Accept-Encoding` и сравнивает `If-None-Match` со своим ETag.
+"""
+import gzip
+import hashlib
+from typing import Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.core.negotiation import parse_quality_values
+from app.core.responses import MSGPACK_MEDIA_TYPE, to_msgpack
+
+# Без пакета brotli отдаются только gzip и несжатый варианты
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IDENTITY: str = "identity"
+JSON_MEDIA_TYPE: str = "application/json"
+# Порядок предпочтения кодировок при равном весе в Accept-Encoding
+ENCODINGS: Tuple[str, ...] = (
+    ("br", "gzip", IDENTITY) if brotli is not None else ("gzip", IDENTITY)
+)
+GZIP_LEVEL: int = 9
+BROTLI_QUALITY: int = 11
+
+
+class PrecompressedBody:
+    """
+    Сериализованное тело ответа с типом `media_type` в вариантах без
+    сжатия, gzip и brotli (если установлен пакет `brotli`).
+
+    ETag строится по хэшу несжатого тела, у сжатых вариантов к нему
+    добавляется суффикс кодировки: сильный ETag относится к конкретному
+    представлению, а не к данным вообще.
+    """
+
+    def __init__(self, body: bytes, media_type: str = JSON_MEDIA_TYPE):
+        self.media_type = media_type
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.variants: Dict[str, bytes] = {IDENTITY: body}
+        self.variants["gzip"] = gzip.compress(
+            body, compresslevel=GZIP_LEVEL, mtime=0
+        )
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(
+                body, quality=BROTLI_QUALITY
+            )
+        self.etags: Dict[str, str] = {
+            encoding: (
+                f'"{digest}"' if encoding == IDENTITY
+                else f'"{digest}-{encoding}"'
+            )
+            for encoding in self.variants
+        }
+
+    @classmethod
+    def from_model(cls, model: BaseModel) -> "PrecompressedBody":
+        """Тело из JSON-представления pydantic-модели."""
+        return cls(model.__pydantic_serializer__.to_json(model))
+
+    def negotiate(self, accept_encoding: Optional[str]) -> str:
+        """
+        Выбирает кодировку по `Accept-Encoding`: наибольший вес, при
+        равном весе — порядок `ENCODINGS`. Без сжатия отдается, если
+        ни один сжатый вариант не подходит.
+        """
+        weights = parse_quality_values(accept_encoding)
+        default = weights.get("*", 0.0)
+        best, best_weight = IDENTITY, 0.0
+        for encoding in ENCODINGS:
+            if encoding == IDENTITY:
+                continue
+            weight = weights.get(encoding, default)
+            if weight > best_weight:
+                best, best_weight = encoding, weight
+        return best
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """
+        Совпадает ли один из ETag заголовка `If-None-Match` с ETag любого
+        варианта. Сравнение слабое, как требует RFC 9110 для этого
+        заголовка, поэтому префикс `W/` не учитывается.
+        """
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        etags = self.etags.values()
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag in etags:
+                return True
+        return False
+
+
+def build_bodies(model: BaseModel) -> Dict[str, PrecompressedBody]:
+    """Тела ответа из модели в JSON и MessagePack по типу содержимого."""
+    return {
+        JSON_MEDIA_TYPE: PrecompressedBody.from_model(model),
+        MSGPACK_MEDIA_TYPE: PrecompressedBody(
+            to_msgpack(model), media_type=MSGPACK_MEDIA_TYPE
+        ),
+    }
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.core.exception import service_overloaded
+from app.core.metrics import (EXECUTOR_QUEUE_DEPTH, EXECUTOR_REJECTED,
+                              EXECUTOR_RUN, EXECUTOR_WAIT)
+
+T = TypeVar("T")
+
+
+def _timed(func: Callable[..., T], *args: Any) -> Tuple[T, float]:
+    """
+    Выполняет `func` внутри пула и возвращает результат вместе со временем
+    выполнения. Функция верхнего уровня, чтобы ее можно было передать
+    в пул процессов.
+    """
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class BoundedExecutor:
+    """
+    Пул потоков или процессов для блокирующих CPU-операций с ограниченной
+    очередью.
+
+    Одновременно в пуле может находиться не больше `workers + queue_size`
+    задач. Остальные вызывающие ждут свободного места не дольше
+    `queue_timeout` секунд, после чего получают 503 — так всплеск нагрузки
+    не копит бесконечную очередь и не блокирует цикл событий.
+
+    Время выполнения и ожидания задач, отказы и глубина очереди
+    публикуются в метриках с меткой `executor=name`.
+    """
+
+    def __init__(
+            self, name: str, kind: str, workers: int, queue_size: int,
+            queue_timeout: float
+    ):
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight: int = 0
+        self.waiting: int = 0
+        self.calls: int = 0
+        self.rejected: int = 0
+        self.run_seconds: float = 0.0
+        self.wait_seconds: float = 0.0
+        self._run_metric = EXECUTOR_RUN.labels(name)
+        self._wait_metric = EXECUTOR_WAIT.labels(name)
+        self._rejected_metric = EXECUTOR_REJECTED.labels(name)
+        self._queue_depth_metric = EXECUTOR_QUEUE_DEPTH.labels(name)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Выполняет `func(*args)` в пуле, не блокируя цикл событий."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers + self.queue_size)
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await self._slots.acquire()
+        except TimeoutError:
+            self.rejected += 1
+            self._rejected_metric.inc()
+            raise service_overloaded
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self._queue_depth_metric.set(self.queue_depth)
+        try:
+            result, elapsed = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), _timed, func, *args
+            )
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            self._queue_depth_metric.set(self.queue_depth)
+        waited = time.perf_counter() - started - elapsed
+        self.calls += 1
+        self.run_seconds += elapsed
+        self.wait_seconds += waited
+        self._run_metric.observe(elapsed)
+        self._wait_metric.observe(waited)
+        return result
+
+    def shutdown(self) -> None:
+        """Останавливает пул, дожидаясь выполнения начатых задач."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._slots = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Число задач, ожидающих свободного исполнителя."""
+        return max(0, self.in_flight - self.workers) + self.waiting
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Состояние очереди и суммарное время выполнения задач."""
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "run_seconds": self.run_seconds,
+            "wait_seconds": self.wait_seconds,
+        }
+
+    def _get_executor(self) -> Executor:
+        """Создает пул при первом обращении."""
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=self.name
+                )
+        return self._executor
+
+
+hashing_executor = BoundedExecutor(
+    name="password_hash",
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+)
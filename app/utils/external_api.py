@@ -1,86 +1,253 @@
 import logging
-from typing import Dict, Any
+from typing import TypeVar
 
-import requests
+import numpy as np
 from fastapi import HTTPException
 from starlette import status
-from requests.models import Response
 
 from app.api.schemas.currency import (ResponseCurrencyList,
                                       RequestCurrencyExchange,
-                                      ResponseCurrencyExchange)
+                                      ResponseCurrencyExchange,
+                                      RequestCurrencyExchangeBatch,
+                                      ResponseCurrencyExchangeBatch)
 from app.core.config import settings
+from app.core.exception import upstream_service_unavailable
+from app.utils.cache import (CurrencyListCache, TTLCache,
+                             currency_list_cache, rates_cache)
+from app.utils.compression import (JSON_MEDIA_TYPE, PrecompressedBody,
+                                   build_bodies)
+from app.utils.providers.base import AbstractRateProvider
+from app.utils.rates import RatesSnapshot
+from app.utils.resilience import (ResiliencePolicy, UpstreamError,
+                                  upstream_policy)
+from app.utils.singleflight import SingleFlight, upstream_flight
 
 logger = logging.getLogger()
 
+T = TypeVar("T")
+
 
 class CurrencyAPI:
     """
-    Логика работы со сторонним сервисом по конвертации валюты
+    Логика работы со сторонним сервисом по конвертации валюты.
 
-    https://apilayer.com/marketplace/currency_data-api
+    Сам сервис скрыт за интерфейсом `AbstractRateProvider` и выбирается
+    настройкой `CURRENCY_PROVIDER`.
     """
 
     logger = logging.getLogger()
 
-    HEADERS = {"apikey": settings.CURRENCY_DATA_API}
-    URL_GET_LIST = "https://api.apilayer.com/currency_data/list"
-    PRE_URL_CONVERT = "https://api.apilayer.com/currency_data/convert"
+    def __init__(
+            self, provider: AbstractRateProvider,
+            cache: CurrencyListCache = currency_list_cache,
+            rates: TTLCache[RatesSnapshot] = rates_cache,
+            flight: SingleFlight = upstream_flight,
+            policy: ResiliencePolicy = upstream_policy
+    ):
+        """
+        Инициализирует сервис с поставщиком курсов валют, кэшем списка
+        валют, кэшем снимка курсов, объединением одинаковых запросов
+        к поставщику и политикой повторов с предохранителем.
+        """
+        self.provider = provider
+        self.cache = cache
+        self.rates = rates
+        self.flight = flight
+        self.policy = policy
 
     async def get_currency_list(self) -> ResponseCurrencyList:
-        """Получить список конвертируемых валют."""
-        response = requests.get(url=self.URL_GET_LIST, headers=self.HEADERS)
-        return await self._get_currencies_from_response(response=response)
+        """
+        Получить список конвертируемых валют из кэша. Устаревший список
+        отдается, пока его обновляет фоновая задача, а запрос к поставщику
+        выполняется, только если в кэше нет пригодного значения. Если
+        поставщик недоступен, отдается последний успешно полученный список.
+        """
+        currency_list = self.cache.get(max_stale=settings.CURRENCY_MAX_STALE)
+        if currency_list is None:
+            try:
+                currency_list = await self.refresh_currency_list()
+            except UpstreamError:
+                currency_list = self._last_good(self.cache)
+        return currency_list
+
+    async def get_currency_list_body(
+            self, media_type: str = JSON_MEDIA_TYPE
+    ) -> PrecompressedBody:
+        """
+        Готовое сжатое тело ответа со списком валют в формате
+        `media_type`. Строится в кэше при сохранении списка, поэтому
+        здесь не сериализуется заново.
+        """
+        currency_list = await self.get_currency_list()
+        body = self.cache.body(media_type)
+        if body is None:
+            # Кэш сброшен после получения списка
+            body = build_bodies(currency_list)[media_type]
+        return body
+
+    async def refresh_currency_list(self) -> ResponseCurrencyList:
+        """
+        Загрузить список валют у поставщика и сохранить его в кэш.
+        Одновременные вызовы объединяются в один запрос.
+        """
+        return await self.flight.do(
+            key=(self.provider.name, "currencies"),
+            func=self._fetch_currency_list
+        )
+
+    async def _fetch_currency_list(self) -> ResponseCurrencyList:
+        """Запрос списка валют к поставщику с сохранением в кэш."""
+        currencies = await self.policy.call(self.provider.fetch_currencies)
+        currency_list = ResponseCurrencyList(currencies=currencies)
+        self.cache.set(currency_list)
+        return currency_list
+
+    async def get_rates_snapshot(self) -> RatesSnapshot:
+        """
+        Получить снимок курсов всех валют относительно базовой валюты из
+        кэша. Как и список валют, устаревший снимок отдается, пока его
+        обновляет фоновая задача, а при недоступности поставщика отдается
+        последний успешно полученный снимок.
+        """
+        snapshot = self.rates.get(max_stale=settings.CURRENCY_MAX_STALE)
+        if snapshot is None:
+            try:
+                snapshot = await self.refresh_rates_snapshot()
+            except UpstreamError:
+                snapshot = self._last_good(self.rates)
+        return snapshot
+
+    async def refresh_rates_snapshot(self) -> RatesSnapshot:
+        """
+        Загрузить снимок курсов у поставщика и сохранить его в кэш.
+        Одновременные вызовы объединяются в один запрос.
+        """
+        return await self.flight.do(
+            key=(self.provider.name, "rates", settings.CURRENCY_BASE),
+            func=self._fetch_rates_snapshot
+        )
+
+    async def _fetch_rates_snapshot(self) -> RatesSnapshot:
+        """Запрос снимка курсов к поставщику с сохранением в кэш."""
+        snapshot = await self.policy.call(
+            lambda: self.provider.fetch_rates(base=settings.CURRENCY_BASE)
+        )
+        self.rates.set(snapshot)
+        return snapshot
 
     async def convert_currency(
             self, data: RequestCurrencyExchange
     ) -> ResponseCurrencyExchange:
-        """Конвертация одной валюты в другую."""
+        """Конвертация одной валюты в другую по кросс-курсу из снимка."""
         await self._check_currency(
             to_currency=data.to_currency, from_currency=data.from_currency
         )
-        url = (
-            f"{self.PRE_URL_CONVERT}?to={data.to_currency}"
-            f"&from={data.from_currency}&amount={data.amount}"
+        snapshot = await self.get_rates_snapshot()
+        try:
+            rate = snapshot.rate(
+                from_currency=data.from_currency,
+                to_currency=data.to_currency,
+            )
+        except KeyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Курс для выбранной пары валют временно недоступен"
+            )
+        return ResponseCurrencyExchange(
+            **data.model_dump(), result=data.amount * rate, rate=rate,
+            timestamp=snapshot.timestamp, stale=self.rates.expired,
         )
-        json_data = await self._get_json_data_or_503(
-            response=requests.get(url=url, headers=self.HEADERS)
+
+    async def convert_currency_batch(
+            self, data: RequestCurrencyExchangeBatch
+    ) -> ResponseCurrencyExchangeBatch:
+        """
+        Пакетная конвертация валют по одному снимку курсов.
+
+        Валюты проверяются за один проход по уникальным кодам, а все
+        результаты считаются векторно. Порядок ответа совпадает с порядком
+        запроса, ошибки возвращаются для каждого элемента отдельно.
+        """
+        await self.get_currency_list()
+        snapshot = await self.get_rates_snapshot()
+        items = data.items
+
+        requested = {item.from_currency for item in items}
+        requested.update(item.to_currency for item in items)
+        index = {
+            symbol: snapshot.index[symbol] for symbol in requested
+            if symbol in self.cache.symbols and symbol in snapshot.index
+        }
+
+        count = len(items)
+        from_index = np.fromiter(
+            (index.get(item.from_currency, -1) for item in items),
+            dtype=np.intp, count=count,
         )
-        return ResponseCurrencyExchange(
-            **{**data.model_dump(), "result": json_data.get("result")}
+        to_index = np.fromiter(
+            (index.get(item.to_currency, -1) for item in items),
+            dtype=np.intp, count=count,
+        )
+        amounts = np.fromiter(
+            (item.amount for item in items), dtype=np.float64, count=count
         )
+        valid = (from_index >= 0) & (to_index >= 0)
+        rates = snapshot.rates_many(
+            from_index=np.where(valid, from_index, 0),
+            to_index=np.where(valid, to_index, 0),
+        )
+        results = amounts * rates
 
-    async def _get_json_data_or_503(
-            self, response: Response
-    ) -> Dict[str, Any]:
-        """Возврат тела ответа или логирование и райз ошибки сервера."""
-        json_data = response.json()
-        if (response.status_code != status.HTTP_200_OK
-                or json_data.get("success") is False
-                or json_data.get("error")):
-            self.logger.error(response.status_code)
-            self.logger.error(response.text)
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Сервис в данный момент недоступен"
-            )
-        return json_data
-
-    async def _get_currencies_from_response(
-            self, response: Response
-    ) -> ResponseCurrencyList:
-        """Получить список валют из ответа запроса."""
-        json_data = await self._get_json_data_or_503(response=response)
-        return ResponseCurrencyList(
-            currencies=json_data.get("currencies")
+        response_items = []
+        for item, is_valid, rate, result in zip(
+                items, valid.tolist(), rates.tolist(), results.tolist()
+        ):
+            response_item = {
+                "from_currency": item.from_currency,
+                "to_currency": item.to_currency,
+                "amount": item.amount,
+            }
+            if is_valid:
+                response_item["result"] = result
+                response_item["rate"] = rate
+            else:
+                unsupported = (
+                    item.from_currency if item.from_currency not in index
+                    else item.to_currency
+                )
+                response_item["error"] = (
+                    f"Валюта {unsupported} не поддерживается"
+                )
+            response_items.append(response_item)
+        # Проверка словарей выполняется в pydantic-core и обходится
+        # дешевле, чем поэлементный `model_construct` на Python
+        return ResponseCurrencyExchangeBatch.model_validate(
+            {
+                "timestamp": snapshot.timestamp,
+                "stale": self.rates.expired,
+                "items": response_items,
+            }
         )
 
+    def _last_good(self, cache: TTLCache[T]) -> T:
+        """
+        Последнее успешно полученное значение из кэша независимо от его
+        возраста или 503, если его нет.
+        """
+        value = cache.get(max_stale=float("inf"))
+        if value is None:
+            raise upstream_service_unavailable
+        self.logger.warning(
+            f"Serving stale data, age {cache.age:.0f} sec"
+        )
+        return value
+
     async def _check_currency(
             self, from_currency: str, to_currency: str
     ) -> None:
         """Проверка доступности валют."""
-        currency_list = await self.get_currency_list()
-        if not currency_list.currencies.get(from_currency):
+        await self.get_currency_list()
+        if from_currency not in self.cache.symbols:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=(
@@ -88,7 +255,7 @@ class CurrencyAPI:
                     + f" не поддерживается [Попробуйте from_currency = EUR]."
                 )
             )
-        if not currency_list.currencies.get(to_currency):
+        if to_currency not in self.cache.symbols:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=(
@@ -0,0 +1,25 @@
+import httpx
+
+from app.core.config import settings
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Создает асинхронный HTTP клиент с пулом соединений для работы со
+    сторонними сервисами.
+
+    Клиент создается один раз на процесс в `lifespan` приложения, поэтому
+    соединения (включая TLS-рукопожатие) переиспользуются между запросами.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.CURRENCY_API_POOL_SIZE,
+            max_keepalive_connections=settings.CURRENCY_API_KEEPALIVE,
+            keepalive_expiry=settings.CURRENCY_API_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            timeout=settings.CURRENCY_API_READ_TIMEOUT,
+            connect=settings.CURRENCY_API_CONNECT_TIMEOUT,
+            pool=settings.CURRENCY_API_CONNECT_TIMEOUT,
+        ),
+    )
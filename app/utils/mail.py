@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from email.message import EmailMessage
+from typing import List, Optional, Sequence
+
+import aiosmtplib
+from fastapi_mail import ConnectionConfig
+
+from app.core.config import settings
+from app.core.metrics import MAIL_SEND_LATENCY, MAIL_SENT
+
+logger = logging.getLogger()
+
+
+class MailSender:
+    """
+    Одно SMTP соединение, которое остается открытым между письмами.
+
+    Соединение открывается при первой отправке. Если сервер закрыл
+    простаивавшее соединение, отправитель переподключается и повторяет
+    отправку один раз.
+    """
+
+    def __init__(self, config: ConnectionConfig):
+        self.config = config
+        self._client: Optional[aiosmtplib.SMTP] = None
+
+    async def send(self, message: EmailMessage) -> None:
+        """Отправляет письмо. Ошибки SMTP выбрасываются вызывающему."""
+        if self.config.SUPPRESS_SEND:
+            MAIL_SENT.labels("suppressed").inc()
+            return
+        started = time.perf_counter()
+        try:
+            try:
+                client = await self._get_client()
+                await client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                self._client = None
+                client = await self._get_client()
+                await client.send_message(message)
+        except (aiosmtplib.SMTPException, OSError):
+            MAIL_SENT.labels("failed").inc()
+            raise
+        MAIL_SEND_LATENCY.observe(time.perf_counter() - started)
+        MAIL_SENT.labels("sent").inc()
+
+    async def close(self) -> None:
+        """Закрывает соединение, если оно открыто."""
+        client, self._client = self._client, None
+        if client is not None and client.is_connected:
+            try:
+                await client.quit()
+            except aiosmtplib.SMTPException:
+                client.close()
+
+    def abort(self) -> None:
+        """
+        Закрывает соединение без QUIT. Нужно, если отправка прервана
+        на середине и состояние SMTP сессии неизвестно.
+        """
+        client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    async def _get_client(self) -> aiosmtplib.SMTP:
+        """Возвращает открытое соединение, при необходимости открывая его."""
+        if self._client is None or not self._client.is_connected:
+            config = self.config
+            client = aiosmtplib.SMTP(
+                hostname=config.MAIL_SERVER,
+                port=config.MAIL_PORT,
+                use_tls=config.MAIL_SSL_TLS,
+                start_tls=config.MAIL_STARTTLS,
+                validate_certs=config.VALIDATE_CERTS,
+                timeout=config.TIMEOUT,
+            )
+            await client.connect()
+            if config.USE_CREDENTIALS:
+                await client.login(
+                    config.MAIL_USERNAME,
+                    config.MAIL_PASSWORD.get_secret_value(),
+                )
+            self._client = client
+        return self._client
+
+
+class MailDispatcher:
+    """
+    Пул из `workers` постоянных SMTP соединений для пакетной отправки.
+
+    Пакет писем делится между соединениями: каждое отправляет свою часть
+    подряд, а соединения работают одновременно. Поэтому всплеск писем
+    не открывает новое соединение с TLS на каждое письмо.
+    """
+
+    def __init__(
+            self, config: ConnectionConfig,
+            workers: int = settings.MAIL_WORKERS
+    ):
+        self.config = config
+        self._senders = [MailSender(config) for _ in range(workers)]
+
+    def compose(self, recipient: str, subject: str, html: str) -> EmailMessage:
+        """Собирает HTML письмо от имени отправителя из настроек."""
+        message = EmailMessage()
+        message["From"] = str(self.config.MAIL_FROM)
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(html, subtype="html")
+        return message
+
+    async def send_many(
+            self, messages: Sequence[EmailMessage],
+            timeout: Optional[float] = None
+    ) -> List[Optional[Exception]]:
+        """
+        Отправляет пакет писем. Возвращает для каждого письма None при
+        успехе или исключение, из-за которого оно не было отправлено.
+
+        Через `timeout` секунд отправка прерывается: соединения, на
+        которых она не закончилась, закрываются, а для неотправленных
+        писем возвращается `TimeoutError`.
+        """
+        timed_out = TimeoutError(f"Not sent within {timeout} sec")
+        results: List[Optional[Exception]] = [timed_out] * len(messages)
+
+        async def run(sender: MailSender, start: int) -> None:
+            try:
+                async with asyncio.timeout(timeout):
+                    for index in range(
+                            start, len(messages), len(self._senders)
+                    ):
+                        try:
+                            await sender.send(messages[index])
+                            results[index] = None
+                        except (aiosmtplib.SMTPException, OSError) as exc:
+                            logger.error(
+                                f"Mail to {messages[index]['To']} "
+                                f"not sent: {exc!r}"
+                            )
+                            results[index] = exc
+            except TimeoutError:
+                sender.abort()
+                logger.error(f"Mail batch not sent within {timeout} sec")
+
+        await asyncio.gather(*(
+            run(sender, start) for start, sender in enumerate(self._senders)
+        ))
+        return results
+
+    async def close(self) -> None:
+        """Закрывает все соединения пула."""
+        await asyncio.gather(*(sender.close() for sender in self._senders))
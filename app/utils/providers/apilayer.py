@@ -0,0 +1,161 @@
+import logging
+import time
+from typing import Any, Dict, Optional, Type, TypeVar
+
+import httpx
+from pydantic import BaseModel, ValidationError
+from starlette import status
+
+from app.core.config import settings
+from app.core.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY
+from app.utils.providers.base import AbstractRateProvider
+from app.utils.rates import RatesSnapshot
+from app.utils.resilience import UpstreamError
+
+P = TypeVar("P", bound=BaseModel)
+
+
+class ListPayload(BaseModel):
+    """Тело ответа `/list`."""
+    currencies: Dict[str, str]
+
+
+class LivePayload(BaseModel):
+    """Тело ответа `/live`."""
+    source: Optional[str] = None
+    quotes: Dict[str, float]
+    timestamp: int
+
+
+class ApiLayerProvider(AbstractRateProvider):
+    """
+    Поставщик курсов валют APILayer Currency Data.
+
+    https://apilayer.com/marketplace/currency_data-api
+    """
+
+    name = "apilayer"
+    logger = logging.getLogger()
+
+    BASE_URL = "https://api.apilayer.com/currency_data"
+
+    def __init__(
+            self, client: httpx.AsyncClient, base_url: str = BASE_URL,
+            api_key: Optional[str] = settings.CURRENCY_DATA_API
+    ):
+        super().__init__(client=client)
+        self.url_get_list = f"{base_url}/list"
+        self.url_get_live = f"{base_url}/live"
+        self.headers = {"apikey": api_key} if api_key else {}
+
+    async def fetch_currencies(self) -> Dict[str, str]:
+        """Получить список конвертируемых валют."""
+        json_data = await self._get_json_data(
+            url=self.url_get_list, operation="list"
+        )
+        payload = self._parse(
+            ListPayload, json_data, url=self.url_get_list, operation="list"
+        )
+        return payload.currencies
+
+    async def fetch_rates(self, base: str) -> RatesSnapshot:
+        """Получить курсы всех валют относительно `base`."""
+        json_data = await self._get_json_data(
+            url=self.url_get_live, operation="live", params={"source": base}
+        )
+        payload = self._parse(
+            LivePayload, json_data, url=self.url_get_live, operation="live"
+        )
+        base = payload.source or base
+        foreign = [quote for quote in payload.quotes if
+                   not quote.startswith(base) or quote == base]
+        if foreign:
+            raise self._malformed(
+                f"quotes without base {base}: {foreign[:5]}",
+                self.url_get_live, "live",
+            )
+        try:
+            return RatesSnapshot.from_quotes(
+                base=base,
+                quotes=payload.quotes,
+                timestamp=payload.timestamp,
+            )
+        except (ValueError, OverflowError, OSError) as exc:
+            # Время котировок вне допустимого диапазона
+            raise self._malformed(
+                f"{type(exc).__name__}: {exc}", self.url_get_live, "live"
+            )
+
+    def _parse(
+            self, model: Type[P], json_data: Dict[str, Any], url: str,
+            operation: str
+    ) -> P:
+        """
+        Проверяет тело успешного ответа схемой `model`. Тело другой
+        структуры выбрасывается как UpstreamError, чтобы сработали
+        предохранитель и отдача последних полученных данных.
+        """
+        try:
+            return model.model_validate(json_data)
+        except ValidationError as exc:
+            raise self._malformed(str(exc), url, operation)
+
+    def _malformed(
+            self, reason: str, url: str, operation: str
+    ) -> UpstreamError:
+        """Учитывает и логирует тело ответа неожиданной структуры."""
+        self.logger.error(f"Malformed body from {url}: {reason}")
+        UPSTREAM_ERRORS.labels(self.name, operation, "invalid_body").inc()
+        return UpstreamError(f"Malformed body: {url}")
+
+    async def _get_json_data(
+            self, url: str, operation: str,
+            params: Dict[str, Any] | None = None
+    ) -> Dict[str, Any]:
+        """
+        Выполнение GET запроса к APILayer и возврат тела ответа.
+        Ошибки запроса логируются и выбрасываются как UpstreamError.
+        Время запроса и ошибки учитываются в метриках с меткой
+        `operation`.
+        """
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(
+                url=url, params=params, headers=self.headers
+            )
+        except httpx.HTTPError as exc:
+            self.logger.error(f"{type(exc).__name__}: {url}")
+            UPSTREAM_ERRORS.labels(self.name, operation, "transport").inc()
+            raise UpstreamError(f"{type(exc).__name__}: {url}")
+        finally:
+            UPSTREAM_LATENCY.labels(self.name, operation).observe(
+                time.perf_counter() - started
+            )
+
+        if response.status_code != status.HTTP_200_OK:
+            UPSTREAM_ERRORS.labels(
+                self.name, operation, str(response.status_code)
+            ).inc()
+            self.logger.error(response.status_code)
+            self.logger.error(response.text)
+            raise UpstreamError(
+                message=f"Status {response.status_code}: {url}",
+                retryable=(
+                    response.status_code >= 500
+                    or response.status_code
+                    == status.HTTP_429_TOO_MANY_REQUESTS
+                ),
+            )
+        try:
+            json_data = response.json()
+        except ValueError:
+            self.logger.error(response.text)
+            UPSTREAM_ERRORS.labels(self.name, operation, "invalid_json").inc()
+            raise UpstreamError(f"Invalid JSON: {url}")
+        if not isinstance(json_data, dict):
+            raise self._malformed("not a JSON object", url, operation)
+        if json_data.get("success") is False or json_data.get("error"):
+            self.logger.error(response.text)
+            UPSTREAM_ERRORS.labels(self.name, operation, "error_body").inc()
+            raise UpstreamError(f"Error in body: {url}", retryable=False)
+        return json_data
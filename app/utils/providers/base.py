@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from typing import Dict
+
+import httpx
+
+from app.utils.rates import RatesSnapshot
+
+
+class AbstractRateProvider(ABC):
+    """
+    Абстрактный поставщик курсов валют.
+
+    Определяет интерфейс получения списка поддерживаемых валют и снимка
+    курсов относительно базовой валюты. Реализации отвечают только за
+    обмен данными со своим сервисом: кэширование, повторы и предохранитель
+    остаются на стороне `CurrencyAPI`. Ошибки обращения к сервису должны
+    выбрасываться как `UpstreamError`.
+    """
+
+    name: str
+
+    def __init__(self, client: httpx.AsyncClient):
+        """Инициализирует поставщика с общим HTTP клиентом приложения."""
+        self.client = client
+
+    @abstractmethod
+    async def fetch_currencies(self) -> Dict[str, str]:
+        """Возвращает словарь `код валюты -> название`."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def fetch_rates(self, base: str) -> RatesSnapshot:
+        """Возвращает снимок курсов всех валют относительно `base`."""
+        raise NotImplementedError
@@ -0,0 +1,21 @@
+from typing import Dict, Type
+
+import httpx
+
+from app.core.config import settings
+from app.utils.providers.apilayer import ApiLayerProvider
+from app.utils.providers.base import AbstractRateProvider
+from app.utils.providers.mock import MockProvider
+
+PROVIDERS: Dict[str, Type[AbstractRateProvider]] = {
+    ApiLayerProvider.name: ApiLayerProvider,
+    MockProvider.name: MockProvider,
+}
+
+
+def create_rate_provider(client: httpx.AsyncClient) -> AbstractRateProvider:
+    """
+    Создает поставщика курсов валют, выбранного в настройке
+    `CURRENCY_PROVIDER`.
+    """
+    return PROVIDERS[settings.CURRENCY_PROVIDER](client=client)
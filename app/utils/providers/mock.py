@@ -0,0 +1,23 @@
+import httpx
+
+from app.core.config import settings
+from app.utils.providers.apilayer import ApiLayerProvider
+
+
+class MockProvider(ApiLayerProvider):
+    """
+    Поставщик курсов валют для нагрузочного тестирования.
+
+    Обращается к локальному серверу `app.utils.providers.mock_server`,
+    который повторяет API APILayer, поэтому не расходует платную квоту
+    и не требует доступа в сеть.
+    """
+
+    name = "mock"
+
+    def __init__(self, client: httpx.AsyncClient):
+        super().__init__(
+            client=client,
+            base_url=f"{settings.MOCK_PROVIDER_URL}/currency_data",
+            api_key=None,
+        )
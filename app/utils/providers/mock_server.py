@@ -0,0 +1,113 @@
+"""
+Локальный сервер, повторяющий API APILayer Currency Data.
+
+Используется вместе с `CURRENCY_PROVIDER=mock` для нагрузочного
+тестирования без расхода квоты и доступа в сеть. Задержка ответа,
+доля ошибок и набор валют задаются настройками `MOCK_PROVIDER_*`.
+
+Запуск:
+    uvicorn app.utils.providers.mock_server:app --port 8001
+"""
+import asyncio
+import math
+import random
+import time
+from typing import Dict, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from starlette import status
+
+from app.core.config import settings
+
+CURRENCY_NAMES: Dict[str, str] = {
+    "AUD": "Australian Dollar",
+    "BRL": "Brazilian Real",
+    "CAD": "Canadian Dollar",
+    "CHF": "Swiss Franc",
+    "CNY": "Chinese Yuan",
+    "CZK": "Czech Republic Koruna",
+    "DKK": "Danish Krone",
+    "EUR": "Euro",
+    "GBP": "British Pound Sterling",
+    "HKD": "Hong Kong Dollar",
+    "INR": "Indian Rupee",
+    "JPY": "Japanese Yen",
+    "KRW": "South Korean Won",
+    "KZT": "Kazakhstani Tenge",
+    "MXN": "Mexican Peso",
+    "NOK": "Norwegian Krone",
+    "PLN": "Polish Zloty",
+    "RUB": "Russian Ruble",
+    "SEK": "Swedish Krona",
+    "SGD": "Singapore Dollar",
+    "TRY": "Turkish Lira",
+    "USD": "United States Dollar",
+}
+CURRENCIES: Dict[str, str] = {
+    code: CURRENCY_NAMES.get(code, code)
+    for code in settings.MOCK_PROVIDER_CURRENCIES.upper().split()
+}
+# Курс каждой валюты к USD детерминирован кодом валюты, чтобы результаты
+# прогонов были сопоставимы между собой
+USD_RATES: Dict[str, float] = {
+    code: 1.0 if code == "USD" else random.Random(code).uniform(0.05, 150)
+    for code in CURRENCIES
+}
+
+app = FastAPI(title="Mock APILayer Currency Data")
+
+
+async def simulate_upstream() -> Optional[JSONResponse]:
+    """
+    Имитирует задержку стороннего сервиса и с заданной вероятностью
+    возвращает ответ с ошибкой.
+    """
+    if settings.MOCK_PROVIDER_LATENCY > 0:
+        await asyncio.sleep(
+            settings.MOCK_PROVIDER_LATENCY * random.uniform(0.5, 1.5)
+        )
+    if random.random() < settings.MOCK_PROVIDER_ERROR_RATE:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"message": "Service Unavailable"},
+        )
+    return None
+
+
+@app.get("/currency_data/list")
+async def currency_list():
+    """Список валют в формате APILayer."""
+    error = await simulate_upstream()
+    if error:
+        return error
+    return {"success": True, "currencies": CURRENCIES}
+
+
+@app.get("/currency_data/live")
+async def currency_live(source: str = "USD"):
+    """Курсы всех валют относительно `source` в формате APILayer."""
+    error = await simulate_upstream()
+    if error:
+        return error
+    source = source.upper()
+    if source not in USD_RATES:
+        return {
+            "success": False,
+            "error": {"code": 201, "info": "Invalid Source Currency."},
+        }
+    timestamp = int(time.time())
+    # Небольшое колебание курсов во времени, как у настоящего сервиса
+    drift = 1 + 0.001 * math.sin(timestamp / 60)
+    return {
+        "success": True,
+        "timestamp": timestamp,
+        "source": source,
+        "quotes": {
+            source + code: (
+                1.0 if code == source
+                else rate * drift / USD_RATES[source]
+            )
+            for code, rate in USD_RATES.items()
+        },
+    }
@@ -0,0 +1,68 @@
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+
+class RatesSnapshot:
+    """
+    Снимок курсов всех валют относительно одной базовой валюты.
+
+    Курсы хранятся в компактном массиве `array('d')`, индексируемом через
+    словарь `символ -> позиция`. Курс любой пары считается локально через
+    базовую валюту (кросс-курс), без обращения к стороннему сервису.
+    Для пакетных расчетов тот же буфер доступен как `numpy` вектор без
+    копирования. Вместо `array` можно передать `memoryview` формата `d`,
+    например над файлом, отображенным в память.
+    """
+
+    __slots__ = ("base", "symbols", "index", "rates", "vector", "timestamp")
+
+    def __init__(
+            self, base: str, symbols: Tuple[str, ...],
+            rates: Union[array, memoryview], timestamp: datetime
+    ):
+        self.base = base
+        self.symbols = symbols
+        self.index: Dict[str, int] = {
+            symbol: position for position, symbol in enumerate(symbols)
+        }
+        self.rates = rates
+        self.vector = np.frombuffer(rates, dtype=np.float64)
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_quotes(
+            cls, base: str, quotes: Dict[str, float], timestamp: int
+    ) -> "RatesSnapshot":
+        """
+        Собирает снимок из ответа вида `{"USDEUR": 0.95, ...}`, где ключ —
+        код базовой валюты, за которым следует код котируемой.
+        """
+        prefix = len(base)
+        symbols = tuple(sorted(quote[prefix:] for quote in quotes))
+        if base not in symbols:
+            symbols = tuple(sorted((*symbols, base)))
+        rates = array("d", (
+            1.0 if symbol == base else float(quotes[base + symbol])
+            for symbol in symbols
+        ))
+        return cls(
+            base=base, symbols=symbols, rates=rates,
+            timestamp=datetime.fromtimestamp(timestamp, tz=timezone.utc),
+        )
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Курс пары `from_currency -> to_currency` через базовую валюту.
+        Выбрасывает KeyError, если одной из валют нет в снимке.
+        """
+        rates, index = self.rates, self.index
+        return rates[index[to_currency]] / rates[index[from_currency]]
+
+    def rates_many(
+            self, from_index: np.ndarray, to_index: np.ndarray
+    ) -> np.ndarray:
+        """Вектор кросс-курсов для массивов индексов валют из снимка."""
+        return self.vector[to_index] / self.vector[from_index]
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+from app.api.schemas.currency import ResponseCurrencyList
+from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.utils.external_api import CurrencyAPI
+from app.utils.rates import RatesSnapshot
+from app.utils.shared_rates import SharedRatesStore
+
+logger = logging.getLogger()
+
+
+class RatesRefresher:
+    """
+    Фоновое обновление списка валют и снимка курсов.
+
+    Задача просыпается раз в `interval` секунд (плюс случайная задержка до
+    `jitter` секунд, чтобы воркеры не ходили к APILayer одновременно) и
+    заранее обновляет те кэши, которые истекут до следующего пробуждения.
+    Пока идет обновление, запросы продолжают получать предыдущие данные.
+
+    С общим файлом `store` к поставщику обращается только воркер,
+    удерживающий его блокировку, и после обновления записывает данные
+    в файл. Остальные воркеры раз в `poll_interval` секунд читают из
+    файла новые данные и пробуют перехватить блокировку.
+    """
+
+    def __init__(
+            self, currency_api: CurrencyAPI,
+            interval: float = settings.CURRENCY_REFRESH_INTERVAL,
+            jitter: float = settings.CURRENCY_REFRESH_JITTER,
+            store: Optional[SharedRatesStore] = None,
+            poll_interval: float = settings.CURRENCY_SNAPSHOT_POLL_INTERVAL
+    ):
+        self.currency_api = currency_api
+        self.interval = interval
+        self.jitter = jitter
+        self.store = store
+        self.poll_interval = poll_interval
+        # Значения кэшей, которые уже есть в общем файле
+        self._published_list: Optional[ResponseCurrencyList] = None
+        self._published_rates: Optional[RatesSnapshot] = None
+        # Время получения списка валют в общем файле — версия списка
+        self._list_updated: float = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Запускает фоновую задачу обновления."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает фоновую задачу обновления."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def refresh(self) -> None:
+        """
+        Обновляет кэши, которые истекут до следующего пробуждения. Если
+        данные обновляет другой воркер, только читает общий файл.
+        """
+        if self.store is not None and not self.store.acquire():
+            self.load_shared()
+            return
+        horizon = self.interval + self.jitter
+        try:
+            if self._expires_within(self.currency_api.cache, horizon):
+                await self.currency_api.refresh_currency_list()
+            if self._expires_within(self.currency_api.rates, horizon):
+                await self.currency_api.refresh_rates_snapshot()
+        finally:
+            # Сохраняется и то, что успело обновиться до ошибки
+            self.publish_shared()
+
+    def load_shared(self) -> bool:
+        """
+        Переносит в кэши данные из общего файла, если он изменился.
+        Возвращает True, если кэши обновлены.
+        """
+        if self.store is None:
+            return False
+        shared = self.store.load()
+        if shared is None:
+            return False
+        cache, rates = self.currency_api.cache, self.currency_api.rates
+        # Данные из файла не заменяют более свежие данные процесса.
+        # Список сравнивается по версии: при записи одних курсов он не
+        # меняется, и повторная установка заново собрала бы тела ответов
+        if (
+                shared.currency_list is not None
+                and shared.list_updated != self._list_updated
+        ):
+            self._list_updated = shared.list_updated
+            if shared.list_age < cache.age:
+                cache.set(shared.currency_list, age=shared.list_age)
+                self._published_list = shared.currency_list
+        if shared.snapshot is not None and shared.rates_age < rates.age:
+            rates.set(shared.snapshot, age=shared.rates_age)
+            self._published_rates = shared.snapshot
+        return True
+
+    def publish_shared(self) -> None:
+        """Записывает кэши в общий файл, если они изменились."""
+        if self.store is None:
+            return
+        cache, rates = self.currency_api.cache, self.currency_api.rates
+        if (
+                cache.value is self._published_list
+                and rates.value is self._published_rates
+        ):
+            return
+        if cache.value is not self._published_list:
+            self._list_updated = time.time() - cache.age
+        self.store.publish(
+            currency_list=cache.value, list_updated=self._list_updated,
+            snapshot=rates.value, rates_age=rates.age,
+        )
+        self._published_list = cache.value
+        self._published_rates = rates.value
+
+    async def _run(self) -> None:
+        """Цикл обновления. Ошибки логируются и не прерывают цикл."""
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"Rates refresh failed: {exc!r}")
+            if self.store is not None and not self.store.is_leader:
+                await asyncio.sleep(self.poll_interval)
+            else:
+                await asyncio.sleep(
+                    self.interval + random.uniform(0, self.jitter)
+                )
+
+    @staticmethod
+    def _expires_within(cache: TTLCache, seconds: float) -> bool:
+        """Истечет ли время жизни значения в кэше в течение `seconds`."""
+        return cache.age + seconds >= cache.ttl
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import UPSTREAM_POLICY_FAILURES
+
+logger = logging.getLogger()
+
+T = TypeVar("T")
+
+
+class UpstreamError(Exception):
+    """
+    Ошибка обращения к стороннему сервису.
+
+    `retryable` показывает, имеет ли смысл повторить запрос (таймаут,
+    обрыв соединения, ответ 5xx или 429).
+    """
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CircuitOpenError(UpstreamError):
+    """Запрос не выполнялся, так как предохранитель разомкнут."""
+
+    def __init__(self):
+        super().__init__("Circuit breaker is open", retryable=False)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для стороннего сервиса.
+
+    После `failure_threshold` ошибок подряд размыкается и в течение
+    `reset_timeout` секунд сразу отклоняет вызовы. Затем пропускает один
+    пробный вызов: успех замыкает предохранитель, ошибка снова размыкает.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures: int = 0
+        self._opened_at: float = 0.0
+        self._state: str = self.CLOSED
+        self._probe_in_flight: bool = False
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние с учетом истекшего `reset_timeout`."""
+        if (self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout):
+            return self.HALF_OPEN
+        return self._state
+
+    def before_call(self) -> None:
+        """Пропускает вызов или выбрасывает CircuitOpenError."""
+        state = self.state
+        if state == self.OPEN or (
+                state == self.HALF_OPEN and self._probe_in_flight):
+            UPSTREAM_POLICY_FAILURES.labels("circuit_open").inc()
+            raise CircuitOpenError()
+        if state == self.HALF_OPEN:
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        """Фиксирует успешный вызов и замыкает предохранитель."""
+        self.failures = 0
+        self._probe_in_flight = False
+        self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        """Фиксирует ошибку и при необходимости размыкает предохранитель."""
+        self.failures += 1
+        if self._probe_in_flight or self.failures >= self.failure_threshold:
+            logger.warning(
+                f"Circuit breaker opened after {self.failures} failures"
+            )
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release(self) -> None:
+        """Освобождает пробный вызов, прерванный без результата."""
+        self._probe_in_flight = False
+
+
+class ResiliencePolicy:
+    """
+    Политика вызова стороннего сервиса: общий дедлайн на вызов вместе со
+    всеми повторами, ограниченное число повторов с экспоненциальной
+    задержкой и предохранитель.
+    """
+
+    def __init__(
+            self, breaker: CircuitBreaker, deadline: float, retries: int,
+            backoff: float
+    ):
+        self.breaker = breaker
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет `func` по политике. Выбрасывает UpstreamError, если
+        вызов так и не удался за отведенное время и число попыток.
+        """
+        deadline_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            remaining = deadline_at - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise TimeoutError
+                async with asyncio.timeout(remaining):
+                    result = await func()
+            except TimeoutError:
+                UPSTREAM_POLICY_FAILURES.labels("deadline").inc()
+                error = UpstreamError("Deadline exceeded", retryable=False)
+            except UpstreamError as exc:
+                error = exc
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+            self.breaker.record_failure()
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+            if (not error.retryable or attempt >= self.retries
+                    or time.monotonic() + delay >= deadline_at):
+                raise error
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+upstream_policy = ResiliencePolicy(
+    breaker=CircuitBreaker(
+        failure_threshold=settings.CURRENCY_API_BREAKER_THRESHOLD,
+        reset_timeout=settings.CURRENCY_API_BREAKER_RESET,
+    ),
+    deadline=settings.CURRENCY_API_DEADLINE,
+    retries=settings.CURRENCY_API_RETRIES,
+    backoff=settings.CURRENCY_API_BACKOFF,
+)
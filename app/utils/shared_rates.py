@@ -0,0 +1,254 @@
+"""
+Общий для воркеров снимок курсов и списка валют в файле на диске.
+
+Воркеры uvicorn — отдельные процессы, и без общего хранилища каждый
+из них обновлял бы свои кэши сам, умножая число запросов к поставщику
+на число воркеров. Поэтому к поставщику ходит один воркер — тот, кто
+удерживает блокировку `flock` на файле `<path>.lock`. Он записывает
+снимок во временный файл и атомарно подменяет им основной через
+`os.replace`. Остальные воркеры замечают новый файл по номеру inode
+и времени изменения и отображают его в память: курсы читаются прямо
+из отображения, без копирования. Если ведущий воркер завершится,
+блокировку при следующей проверке получит другой.
+
+Файл остается на диске, поэтому перезапущенный процесс сразу отдает
+последний снимок, не дожидаясь первого ответа поставщика.
+
+Формат файла: заголовок `HEADER`, курсы в `float64` с порядком байтов
+машины (файл локальный), коды валют в ASCII через пробел и JSON списка
+валют.
+"""
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional, Tuple
+
+from app.api.schemas.currency import ResponseCurrencyList
+from app.core.config import settings
+from app.utils.rates import RatesSnapshot
+
+# Без fcntl (Windows) каждый процесс обновляет данные сам
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger()
+
+MAGIC: bytes = b"RATESNAP"
+VERSION: int = 1
+# magic, версия, число курсов, базовая валюта, длина кодов валют, длина
+# JSON списка валют, время курсов у поставщика, время получения курсов
+# и списка валют (UNIX время, 0 — данных нет). Время получения списка
+# не меняется, пока ведущий воркер не получит новый список, и служит его
+# версией. Размер кратен 8, поэтому курсы в отображении выровнены для
+# `float64`
+HEADER = struct.Struct("<8sII8sIIddd")
+RATE_SIZE: int = 8
+
+
+class SharedRates(NamedTuple):
+    """
+    Данные из файла и их возраст в секундах. `list_updated` — время
+    получения списка валют из заголовка (0 — списка нет).
+    """
+    currency_list: Optional[ResponseCurrencyList]
+    list_age: float
+    list_updated: float
+    snapshot: Optional[RatesSnapshot]
+    rates_age: float
+
+
+def encode(
+        currency_list: Optional[ResponseCurrencyList], list_updated: float,
+        snapshot: Optional[RatesSnapshot], rates_age: float
+) -> bytes:
+    """
+    Содержимое файла для списка валют, полученного в `list_updated`
+    (UNIX время), и снимка курсов.
+    """
+    now = time.time()
+    list_json = (
+        currency_list.__pydantic_serializer__.to_json(currency_list)
+        if currency_list is not None else b""
+    )
+    if snapshot is not None:
+        base = snapshot.base.encode("ascii")
+        symbols = " ".join(snapshot.symbols).encode("ascii")
+        rates = snapshot.vector.tobytes()
+        count = len(snapshot.symbols)
+        timestamp = snapshot.timestamp.timestamp()
+        rates_updated = now - rates_age
+    else:
+        base, symbols, rates, count = b"", b"", b"", 0
+        timestamp = rates_updated = 0.0
+    header = HEADER.pack(
+        MAGIC, VERSION, count, base, len(symbols), len(list_json),
+        timestamp, rates_updated,
+        list_updated if currency_list is not None else 0.0,
+    )
+    return b"".join((header, rates, symbols, list_json))
+
+
+def decode(buffer: mmap.mmap) -> SharedRates:
+    """
+    Данные из отображенного в память файла. Курсы снимка ссылаются
+    на `buffer` без копирования. Выбрасывает ValueError, если файл
+    поврежден или записан в другом формате.
+    """
+    if len(buffer) < HEADER.size:
+        raise ValueError("Файл снимка короче заголовка")
+    (
+        magic, version, count, base, symbols_size, list_size, timestamp,
+        rates_updated, list_updated,
+    ) = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Неизвестный формат файла снимка")
+    rates_end = HEADER.size + count * RATE_SIZE
+    symbols_end = rates_end + symbols_size
+    if len(buffer) != symbols_end + list_size:
+        raise ValueError("Размер файла снимка не совпадает с заголовком")
+
+    now = time.time()
+    snapshot, rates_age = None, float("inf")
+    if count:
+        symbols = tuple(
+            buffer[rates_end:symbols_end].decode("ascii").split(" ")
+        )
+        if len(symbols) != count:
+            raise ValueError("Число валют не совпадает с числом курсов")
+        snapshot = RatesSnapshot(
+            base=base.rstrip(b"\0").decode("ascii"),
+            symbols=symbols,
+            rates=memoryview(buffer)[HEADER.size:rates_end].cast("d"),
+            timestamp=datetime.fromtimestamp(timestamp, tz=timezone.utc),
+        )
+        rates_age = max(now - rates_updated, 0.0)
+
+    currency_list, list_age = None, float("inf")
+    if list_size:
+        currency_list = ResponseCurrencyList.model_validate_json(
+            buffer[symbols_end:]
+        )
+        list_age = max(now - list_updated, 0.0)
+    return SharedRates(
+        currency_list=currency_list, list_age=list_age,
+        list_updated=list_updated, snapshot=snapshot, rates_age=rates_age,
+    )
+
+
+class SharedRatesStore:
+    """
+    ### Файл со снимком курсов, общий для всех воркеров.
+
+    `acquire` определяет, обновляет ли данные текущий процесс,
+    `publish` записывает их, а `load` читает файл, если он изменился
+    с прошлого чтения.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._lock_fd: Optional[int] = None
+        self._stamp: Optional[Tuple[int, int, int]] = None
+
+    @property
+    def is_leader(self) -> bool:
+        """Удерживает ли процесс блокировку записи."""
+        return self._lock_fd is not None or fcntl is None
+
+    def acquire(self) -> bool:
+        """
+        Пытается стать единственным процессом, который обновляет
+        данные. Блокировка удерживается до `release` или завершения
+        процесса. Не ждет, если блокировку удерживает другой процесс.
+        """
+        if self.is_leader:
+            return True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        logger.info(f"Process {os.getpid()} writes shared rates snapshot")
+        return True
+
+    def release(self) -> None:
+        """Снимает блокировку записи, если процесс ее удерживает."""
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def publish(
+            self, currency_list: Optional[ResponseCurrencyList],
+            list_updated: float, snapshot: Optional[RatesSnapshot],
+            rates_age: float
+    ) -> None:
+        """
+        Атомарно заменяет файл: читатели видят либо прежний, либо новый
+        снимок целиком, а уже отображенный прежний файл остается
+        доступным, пока на него есть ссылки.
+        """
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        data = encode(currency_list, list_updated, snapshot, rates_age)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(self.path)}."
+        )
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._stamp = self._file_stamp()
+
+    def load(self) -> Optional[SharedRates]:
+        """
+        Данные из файла или None, если файла нет, он не изменился с
+        прошлого вызова или поврежден.
+        """
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return None
+        try:
+            with open(self.path, "rb") as file:
+                # Отображение остается действительным после закрытия
+                # файла и живет, пока на него ссылается снимок
+                buffer = mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            shared = decode(buffer)
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Shared rates snapshot is unreadable: {exc!r}")
+            shared = None
+        self._stamp = stamp
+        return shared
+
+    def _file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        """Номер inode, время изменения и размер файла снимка."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def create_rates_store() -> Optional[SharedRatesStore]:
+    """
+    Общий файл снимка по настройке `CURRENCY_SNAPSHOT_PATH` или None,
+    если она не задана.
+    """
+    if not settings.CURRENCY_SNAPSHOT_PATH:
+        return None
+    return SharedRatesStore(path=settings.CURRENCY_SNAPSHOT_PATH)
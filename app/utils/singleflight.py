@@ -0,0 +1,61 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.metrics import SINGLEFLIGHT_CALLS
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых вызовов.
+
+    Пока выполняется вызов с ключом `key`, остальные вызывающие с тем же
+    ключом не запускают новый, а ожидают результат уже запущенного.
+    Счетчики `calls` и `coalesced` показывают, сколько вызовов было
+    выполнено и сколько присоединилось к уже выполняющимся.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.calls: int = 0
+        self.coalesced: int = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет `func` или присоединяется к уже выполняющемуся вызову
+        с тем же ключом. Отмена одного из ожидающих не отменяет вызов для
+        остальных.
+        """
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            SINGLEFLIGHT_CALLS.labels("coalesced").inc()
+        else:
+            self.calls += 1
+            SINGLEFLIGHT_CALLS.labels("executed").inc()
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики выполненных и объединенных вызовов."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Снимает завершенный вызов с учета."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Исключение забирается, чтобы не было предупреждения, если
+            # все ожидающие были отменены раньше завершения вызова
+            task.exception()
+
+
+upstream_flight = SingleFlight()
@@ -0,0 +1,13 @@
+from functools import lru_cache
+from os import path
+
+from app.core.config import BASE_DIR
+
+TEMPLATES_DIR: str = path.join(BASE_DIR, "template")
+
+
+@lru_cache(maxsize=None)
+def load_template(name: str) -> str:
+    """Читает HTML шаблон письма один раз за время жизни процесса."""
+    with open(path.join(TEMPLATES_DIR, name), "r", encoding="utf-8") as file:
+        return file.read()
@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
-from app.db.database import async_session_maker
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import async_read_only_session_maker, async_session_maker
+from app.repositories.outbox_repository import OutboxRepository
 from app.repositories.user_repository import UserRepository
 
 
@@ -14,17 +18,27 @@ class IUnitOfWork(ABC):
 
     Атрибуты:
         user (UserRepository): Репозиторий для работы с пользователями.
+        outbox (OutboxRepository): Репозиторий исходящих писем.
 
     После реализации нового репозитория необходимо его добавить здесь.
     """
 
     user: UserRepository
+    outbox: OutboxRepository
 
     @abstractmethod
     def __init__(self):
         """Инициализация Unit of Work."""
         ...
 
+    @abstractmethod
+    def __call__(self, read_only: bool = False) -> "IUnitOfWork":
+        """
+        Задает режим работы для следующего входа в UoW:
+        `async with uow(read_only=True): ...`
+        """
+        ...
+
     @abstractmethod
     async def __aenter__(self):
         """Асинхронный контекстный менеджер для входа в UoW."""
@@ -54,35 +68,97 @@ class UnitOfWork(IUnitOfWork):
     управления транзакциями. Он также инициализирует репозитории для работы
     с данными.
 
+    Режим только для чтения задается вызовом `uow(read_only=True)` перед
+    входом в контекст и действует до выхода из него: транзакция
+    открывается как BEGIN READ ONLY, `commit` запрещен, а при выходе
+    транзакция просто закрывается.
+
+    Сессия и репозитории создаются при первом обращении к репозиторию,
+    а соединение берется из пула только при первом запросе. Если к БД
+    так и не обратились, выход из контекста ничего не делает.
+
     Атрибуты:
         session_factory: Фабрика для создания асинхронных сессий базы данных.
         session: Текущая сессия базы данных.
         user (UserRepository): Репозиторий для работы с пользователями.
+        outbox (OutboxRepository): Репозиторий исходящих писем.
     """
     def __init__(self):
         """Инициализация Unit of Work. Устанавливает фабрику для создания
         асинхронных сессий к БД."""
         self.session_factory = async_session_maker
+        self.read_only: bool = False
+        self._session: Optional[AsyncSession] = None
+        self._user: Optional[UserRepository] = None
+        self._outbox: Optional[OutboxRepository] = None
+
+    def __call__(self, read_only: bool = False) -> "UnitOfWork":
+        """Задает режим работы для следующего входа в UoW."""
+        self.read_only = read_only
+        return self
 
     async def __aenter__(self):
         """
-        Асинхронный вход в контекст UoW. Создает новую сессию базы данных
-        и инициализирует репозитории.
+        Асинхронный вход в контекст UoW. Сбрасывает сессию и репозитории
+        прошлого входа: они создаются заново при первом обращении.
 
         После реализации нового репозитория необходимо его добавить здесь.
         """
-        self.session = self.session_factory()
-
-        self.user = UserRepository(self.session)
+        self._session = None
+        self._user = None
+        self._outbox = None
 
     async def __aexit__(self, *args):
         """Асинхронный выход из контекста UoW. Выполняет откат изменений и
-        закрывает сессию базы данных."""
-        await self.rollback()
-        await self.session.close()
+        закрывает сессию базы данных, если она была открыта.
+
+        В режиме `read_only` сессия только закрывается: загруженные объекты
+        не сбрасываются и остаются доступны после выхода из контекста."""
+        try:
+            if self._session is not None:
+                if not self.read_only:
+                    await self.rollback()
+                await self._session.close()
+        finally:
+            self._session = None
+            self._user = None
+            self._outbox = None
+            self.read_only = False
+
+    @property
+    def session(self) -> AsyncSession:
+        """Текущая сессия. Создается при первом обращении."""
+        if self._session is None:
+            factory = (
+                async_read_only_session_maker if self.read_only
+                else self.session_factory
+            )
+            self._session = factory()
+        return self._session
+
+    @property
+    def user(self) -> UserRepository:
+        """
+        Репозиторий пользователей текущей сессии.
+
+        После реализации нового репозитория необходимо добавить
+        аналогичное свойство.
+        """
+        if self._user is None:
+            self._user = UserRepository(self.session)
+        return self._user
+
+    @property
+    def outbox(self) -> OutboxRepository:
+        """Репозиторий исходящих писем текущей сессии."""
+        if self._outbox is None:
+            self._outbox = OutboxRepository(self.session)
+        return self._outbox
 
     async def commit(self):
         """Применяет все изменения, сделанные в рамках текущей транзакции."""
+        if self.read_only:
+            raise RuntimeError("Read-only UnitOfWork cannot commit")
         await self.session.commit()
 
     async def rollback(self):
@@ -0,0 +1,165 @@
+"""
+Воркер доставки писем из таблицы `email_outbox`.
+
+Запускается отдельным процессом, чтобы ожидание SMTP сервера не делило
+цикл событий с API:
+
+    python -m app.workers.outbox
+
+Можно запускать несколько экземпляров: письма распределяются между ними
+через `SELECT ... FOR UPDATE SKIP LOCKED`.
+"""
+import asyncio
+import logging
+import random
+import signal
+
+from app.core.config import settings
+from app.core.log_config import init_loggers
+from app.core.metrics import (MAIL_OUTBOX_PENDING, mark_process_dead,
+                              start_metrics_server)
+from app.db.database import dispose_engine, init_engine
+from app.db.models import EmailOutbox
+from app.utils.mail import MailDispatcher
+from app.utils.unitofwork import IUnitOfWork, UnitOfWork
+
+logger = logging.getLogger()
+
+
+class OutboxWorker:
+    """
+    Забирает из таблицы `email_outbox` пакеты писем, время отправки
+    которых наступило, отправляет их через пул SMTP соединений
+    и записывает результат.
+
+    Неотправленное письмо повторяется с экспоненциальной задержкой от
+    `backoff` до `backoff_max` секунд, а после `max_attempts` попыток
+    помечается как `failed`.
+
+    Отправка пакета ограничена временем аренды `lease` за вычетом
+    `LEASE_MARGIN` на запись результата. Иначе медленный SMTP сервер
+    задержал бы пакет дольше аренды, другой воркер забрал бы те же
+    письма и отправил их повторно.
+    """
+
+    LEASE_MARGIN: float = 15.0
+
+    def __init__(
+            self, dispatcher: MailDispatcher, uow: IUnitOfWork,
+            batch_size: int = settings.OUTBOX_BATCH_SIZE,
+            poll_interval: float = settings.OUTBOX_POLL_INTERVAL,
+            lease: float = settings.OUTBOX_LEASE,
+            max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+            backoff: float = settings.OUTBOX_BACKOFF,
+            backoff_max: float = settings.OUTBOX_BACKOFF_MAX
+    ):
+        self.dispatcher = dispatcher
+        self.uow = uow
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """
+        Обрабатывает пакеты, пока не установлен `stop`. Если писем меньше
+        полного пакета, ждет `poll_interval` секунд перед следующим.
+        """
+        while not stop.is_set():
+            try:
+                processed = await self.process_batch()
+            except Exception as exc:
+                logger.error(f"Outbox batch failed: {exc!r}")
+                processed = 0
+            if processed < self.batch_size:
+                try:
+                    async with asyncio.timeout(self.poll_interval):
+                        await stop.wait()
+                except TimeoutError:
+                    pass
+
+    async def process_batch(self) -> int:
+        """Отправляет один пакет писем и возвращает его размер."""
+        async with self.uow:
+            rows = await self.uow.outbox.claim(
+                limit=self.batch_size, lease=self.lease
+            )
+            if not rows:
+                MAIL_OUTBOX_PENDING.set(await self.uow.outbox.count_pending())
+            await self.uow.commit()
+        if not rows:
+            return 0
+
+        errors = await self.dispatcher.send_many(
+            [
+                self.dispatcher.compose(
+                    recipient=row.recipient, subject=row.subject,
+                    html=row.body
+                )
+                for row in rows
+            ],
+            timeout=self.send_timeout,
+        )
+
+        sent = [row.id for row, error in zip(rows, errors) if error is None]
+        failures = [
+            {
+                "row_id": row.id,
+                "new_status": (
+                    EmailOutbox.FAILED if row.attempts >= self.max_attempts
+                    else EmailOutbox.PENDING
+                ),
+                "error": repr(error),
+                "delay": self.retry_delay(row.attempts),
+            }
+            for row, error in zip(rows, errors) if error is not None
+        ]
+        async with self.uow:
+            await self.uow.outbox.mark_sent(sent)
+            await self.uow.outbox.mark_failed(failures)
+            MAIL_OUTBOX_PENDING.set(await self.uow.outbox.count_pending())
+            await self.uow.commit()
+        return len(rows)
+
+    @property
+    def send_timeout(self) -> float:
+        """
+        Время на отправку пакета: аренда без запаса на запись
+        результата, но не меньше половины аренды.
+        """
+        return self.lease - min(self.LEASE_MARGIN, self.lease / 2)
+
+    def retry_delay(self, attempts: int) -> float:
+        """Задержка перед следующей попыткой после `attempts` попыток."""
+        delay = min(self.backoff_max, self.backoff * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+
+async def main() -> None:
+    """Запускает воркер до получения SIGINT или SIGTERM."""
+    init_loggers()
+    init_engine()
+    if settings.OUTBOX_METRICS_PORT:
+        start_metrics_server(settings.OUTBOX_METRICS_PORT)
+
+    dispatcher = MailDispatcher(config=settings.get_connect_email_sender())
+    worker = OutboxWorker(dispatcher=dispatcher, uow=UnitOfWork())
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    logger.info("Outbox worker started")
+    try:
+        await worker.run(stop)
+    finally:
+        await dispatcher.close()
+        await dispose_engine()
+        mark_process_dead()
+        logger.info("Outbox worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+"""Общие параметры нагрузочных тестов и микробенчмарков."""
+import os
+import platform
+from pathlib import Path
+from typing import Any, Dict
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BASELINES_DIR = Path(__file__).resolve().parent / "baselines"
+
+# Обязательные настройки приложения, которые в бенчмарках
+# не используются. Заданные в окружении значения не заменяются.
+ENV_DEFAULTS: Dict[str, str] = {
+    "SECRET_KEY": "loadtest-secret",
+    "DB_USER": "loadtest",
+    "DB_PASS": "loadtest",
+    "DB_HOST": "127.0.0.1",
+    "DB_PORT": "5432",
+    "DB_NAME": "loadtest",
+    "CURRENCY_DATA_API": "loadtest",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "SMTP_USER": "loadtest@example.com",
+    "SMTP_PASSWORD": "loadtest",
+    "SMTP_HOST": "127.0.0.1",
+    "SMTP_PORT": "25",
+}
+
+
+def apply_env_defaults() -> None:
+    """
+    Дополняет окружение процесса значениями `ENV_DEFAULTS`. Вызывается
+    до первого импорта модулей `app`, которые читают настройки.
+    """
+    for key, value in ENV_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+
+def machine_info() -> Dict[str, Any]:
+    """Сведения об окружении запуска для сравнения результатов."""
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
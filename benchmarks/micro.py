@@ -0,0 +1,519 @@
+"""
+Микробенчмарки функций, выполняемых на каждом запросе.
+
+Не требуют БД, сети и запущенного приложения. Каждый бенчмарк
+калибруется так, чтобы один замер длился не меньше `--min-time`
+секунд, затем выполняется `--repeat` замеров. В результат попадают
+медиана, минимум и разброс времени одного вызова в наносекундах.
+
+Результат выводится в виде JSON с постоянным порядком ключей, его
+удобно сохранять на каждом коммите и сравнивать между собой. Если есть
+сохраненный базовый результат, он сравнивается с текущим, и при
+замедлении больше допуска процесс завершается с кодом 1.
+
+Запуск из корня проекта:
+    python -m benchmarks.micro
+    python -m benchmarks.micro --filter security --repeat 11
+    python -m benchmarks.micro --output before.json
+    python -m benchmarks.micro --diff before.json after.json
+    python -m benchmarks.micro --save-baseline
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.common import BASELINES_DIR, apply_env_defaults, machine_info
+
+apply_env_defaults()
+
+from fastapi import HTTPException  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+from starlette.types import Message, Receive, Scope, Send  # noqa: E402
+
+from app.api.schemas.currency import (  # noqa: E402
+    RequestCurrencyExchange, ResponseCurrencyExchange,
+    ResponseCurrencyExchangeBatch)
+from app.api.schemas.user import (RequestUserCreate,  # noqa: E402
+                                  ResponseUserLogin)
+from app.api.schemas.validators import password_validator  # noqa: E402
+from app.core import security  # noqa: E402
+from app.core.middleware import ExceptionHandlerMiddleware  # noqa: E402
+from app.core.responses import (FastJSONResponse,  # noqa: E402
+                                MsgPackResponse)
+from app.utils.cache import token_cache  # noqa: E402
+from app.utils.rates import RatesSnapshot  # noqa: E402
+from app.utils.shared_rates import SharedRatesStore  # noqa: E402
+
+BASELINE_PATH = BASELINES_DIR / "micro.json"
+
+# Фабрики бенчмарков: каждая подготавливает данные и возвращает
+# вызываемый объект без аргументов (функцию или корутинную функцию)
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str):
+    """Регистрирует фабрику бенчмарка под именем `name`."""
+    def decorator(factory: Callable[[], Callable[[], Any]]):
+        BENCHMARKS[name] = factory
+        return factory
+    return decorator
+
+
+TOKEN_PAYLOAD: Dict[str, Any] = {"email": "user@example.com", "user_id": 1}
+EXCHANGE_DATA: Dict[str, Any] = {
+    "from_currency": "USD", "to_currency": "EUR", "amount": 100,
+}
+USER_DATA: Dict[str, Any] = {
+    "email": "user@example.com", "username": "user",
+    "password": "Secret-Passw0rd",
+}
+HTTP_SCOPE: Scope = {
+    "type": "http", "method": "GET", "path": "/api/currency/list/",
+    "headers": [(b"host", b"localhost"), (b"accept", b"application/json")],
+}
+
+
+def make_token() -> str:
+    """Действующий JWT токен с полезной нагрузкой `TOKEN_PAYLOAD`."""
+    return asyncio.run(security.create_access_token(data=TOKEN_PAYLOAD))
+
+
+@benchmark("security.create_access_token")
+def bench_create_access_token():
+    async def run():
+        await security.create_access_token(data=TOKEN_PAYLOAD)
+    return run
+
+
+@benchmark("security.decode_access_token")
+def bench_decode_access_token():
+    token = make_token()
+
+    async def run():
+        await security.decode_access_token(token=token)
+    return run
+
+
+@benchmark("security.get_current_user.cached")
+def bench_get_current_user_cached():
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer", credentials=make_token()
+    )
+
+    async def run():
+        await security.get_current_user(credentials=credentials)
+    return run
+
+
+@benchmark("security.get_current_user.uncached")
+def bench_get_current_user_uncached():
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer", credentials=make_token()
+    )
+
+    async def run():
+        token_cache.clear()
+        await security.get_current_user(credentials=credentials)
+    return run
+
+
+@benchmark("schemas.RequestCurrencyExchange.validate")
+def bench_request_exchange():
+    def run():
+        RequestCurrencyExchange.model_validate(EXCHANGE_DATA)
+    return run
+
+
+@benchmark("schemas.RequestUserCreate.validate")
+def bench_request_user_create():
+    def run():
+        RequestUserCreate.model_validate(USER_DATA)
+    return run
+
+
+@benchmark("schemas.password_validator")
+def bench_password_validator():
+    password = USER_DATA["password"]
+
+    def run():
+        password_validator(value=password)
+    return run
+
+
+@benchmark("schemas.ResponseCurrencyExchange.build")
+def bench_response_exchange_build():
+    timestamp = datetime.now(timezone.utc)
+
+    def run():
+        ResponseCurrencyExchange(
+            **EXCHANGE_DATA, result=92.5, rate=0.925, timestamp=timestamp
+        )
+    return run
+
+
+@benchmark("schemas.ResponseCurrencyExchange.dump_json")
+def bench_response_exchange_dump():
+    response = ResponseCurrencyExchange(
+        **EXCHANGE_DATA, result=92.5, rate=0.925,
+        timestamp=datetime.now(timezone.utc),
+    )
+
+    def run():
+        response.model_dump_json()
+    return run
+
+
+# Маршруты, ответы которых сравниваются в `responses.*`
+ENDPOINTS = ("exchange", "exchange_batch", "login")
+
+
+def endpoint_responses() -> Dict[str, BaseModel]:
+    """Типичные ответы маршрутов для замера сериализации."""
+    timestamp = datetime.now(timezone.utc)
+    return {
+        "exchange": ResponseCurrencyExchange(
+            **EXCHANGE_DATA, result=92.5, rate=0.925, timestamp=timestamp
+        ),
+        "exchange_batch": ResponseCurrencyExchangeBatch(
+            timestamp=timestamp,
+            items=[
+                {**EXCHANGE_DATA, "amount": i, "result": i * 0.925,
+                 "rate": 0.925}
+                for i in range(100)
+            ],
+        ),
+        "login": ResponseUserLogin(token=make_token()),
+    }
+
+
+def register_serialization_benchmarks() -> None:
+    """
+    Для каждого маршрута из `ENDPOINTS` регистрирует три бенчмарка:
+    `fastapi` — путь FastAPI по умолчанию (проверка модели по
+    `response_model`, словарь и `JSONResponse` на модуле `json`),
+    `default` — тот же путь с `FastJSONResponse` как классом ответа
+    приложения и `direct` — `FastJSONResponse`, возвращаемый маршрутом.
+    Отдельно замеряется `msgpack` — `MsgPackResponse` из той же модели.
+    """
+    for endpoint in ENDPOINTS:
+        for name, response_class in (
+                ("fastapi", JSONResponse), ("default", FastJSONResponse)
+        ):
+            def bench_serialized(endpoint=endpoint, cls=response_class):
+                model = endpoint_responses()[endpoint]
+                field = create_model_field(
+                    name="Response", type_=type(model), mode="serialization"
+                )
+
+                async def run():
+                    content = await serialize_response(
+                        field=field, response_content=model
+                    )
+                    cls(content=content)
+                return run
+
+            benchmark(f"responses.{endpoint}.{name}")(bench_serialized)
+
+        for name, response_class in (
+                ("direct", FastJSONResponse), ("msgpack", MsgPackResponse)
+        ):
+            def bench_direct(endpoint=endpoint, cls=response_class):
+                model = endpoint_responses()[endpoint]
+
+                def run():
+                    cls(content=model)
+                return run
+
+            benchmark(f"responses.{endpoint}.{name}")(bench_direct)
+
+
+register_serialization_benchmarks()
+
+
+def make_snapshot() -> RatesSnapshot:
+    """Снимок курсов 170 валют, как у APILayer."""
+    symbols = [
+        chr(65 + i // 26 // 26 % 26) + chr(65 + i // 26 % 26)
+        + chr(65 + i % 26) for i in range(170)
+    ]
+    return RatesSnapshot.from_quotes(
+        base="USD",
+        quotes={f"USD{symbol}": 1.0 + i for i, symbol in enumerate(symbols)},
+        timestamp=int(time.time()),
+    )
+
+
+def make_shared_store() -> SharedRatesStore:
+    """Файл снимка во временном каталоге, уже прочитанный `load`."""
+    path = Path(tempfile.mkdtemp()) / "rates.snapshot"
+    store = SharedRatesStore(path=str(path))
+    store.publish(
+        currency_list=None, list_updated=0.0, snapshot=make_snapshot(),
+        rates_age=0.0,
+    )
+    return store
+
+
+@benchmark("rates.RatesSnapshot.rate.array")
+def bench_rate_array():
+    snapshot = make_snapshot()
+
+    def run():
+        snapshot.rate("AAC", "AFZ")
+    return run
+
+
+@benchmark("rates.RatesSnapshot.rate.mmap")
+def bench_rate_mmap():
+    store = make_shared_store()
+    snapshot = SharedRatesStore(path=store.path).load().snapshot
+
+    def run():
+        snapshot.rate("AAC", "AFZ")
+    return run
+
+
+@benchmark("rates.SharedRatesStore.load.unchanged")
+def bench_shared_load_unchanged():
+    store = make_shared_store()
+
+    def run():
+        store.load()
+    return run
+
+
+@benchmark("rates.SharedRatesStore.load.changed")
+def bench_shared_load_changed():
+    path = make_shared_store().path
+
+    def run():
+        SharedRatesStore(path=path).load()
+    return run
+
+
+async def receive() -> Message:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message: Message) -> None:
+    pass
+
+
+async def plain_app(scope: Scope, receive: Receive, send: Send) -> None:
+    """ASGI приложение с минимальным ответом для замера обвязки."""
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def failing_app(scope: Scope, receive: Receive, send: Send) -> None:
+    """ASGI приложение, завершающееся HTTPException."""
+    raise HTTPException(status_code=404, detail="Not found")
+
+
+@benchmark("middleware.plain_app")
+def bench_plain_app():
+    async def run():
+        await plain_app(dict(HTTP_SCOPE), receive, send)
+    return run
+
+
+@benchmark("middleware.ExceptionHandlerMiddleware.ok")
+def bench_middleware_ok():
+    app = ExceptionHandlerMiddleware(plain_app)
+
+    async def run():
+        await app(dict(HTTP_SCOPE), receive, send)
+    return run
+
+
+@benchmark("middleware.ExceptionHandlerMiddleware.http_exception")
+def bench_middleware_http_exception():
+    app = ExceptionHandlerMiddleware(failing_app)
+
+    async def run():
+        await app(dict(HTTP_SCOPE), receive, send)
+    return run
+
+
+def timer(func: Callable[[], Any]) -> Callable[[int], float]:
+    """
+    Функция замера `loops` вызовов `func`. Корутины выполняются в одном
+    цикле событий подряд, чтобы в замер не попадал запуск цикла.
+    """
+    if inspect.iscoroutinefunction(func):
+        loop = asyncio.new_event_loop()
+
+        async def run_loops(loops: int) -> float:
+            started = time.perf_counter()
+            for _ in range(loops):
+                await func()
+            return time.perf_counter() - started
+
+        return lambda loops: loop.run_until_complete(run_loops(loops))
+
+    def measure(loops: int) -> float:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        return time.perf_counter() - started
+
+    return measure
+
+
+def run_benchmark(
+        func: Callable[[], Any], repeat: int, min_time: float
+) -> Dict[str, Any]:
+    """Калибрует число вызовов в замере и выполняет `repeat` замеров."""
+    measure = timer(func)
+    loops = 1
+    while (elapsed := measure(loops)) < min_time:
+        # Рост не больше чем в 10 раз за шаг, чтобы не перескочить
+        # min_time на порядок из-за шума первых коротких замеров
+        factor = min_time / elapsed if elapsed > 0 else 10
+        loops *= max(2, min(10, int(factor) + 1))
+    samples = [measure(loops) / loops * 1e9 for _ in range(repeat)]
+    return {
+        "loops": loops,
+        "median_ns": round(statistics.median(samples), 1),
+        "min_ns": round(min(samples), 1),
+        "stdev_ns": round(statistics.pstdev(samples), 1),
+    }
+
+
+def compare(
+        result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> Dict[str, Any]:
+    """
+    Отношение медиан текущего и базового результата по каждому общему
+    бенчмарку и список замедлившихся больше чем на `tolerance`.
+    """
+    ratios: Dict[str, float] = {}
+    regressions: List[str] = []
+    base_benchmarks = baseline.get("benchmarks", {})
+    for name, current in result["benchmarks"].items():
+        base = base_benchmarks.get(name)
+        if base is None:
+            continue
+        ratio = current["median_ns"] / base["median_ns"]
+        ratios[name] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{name}: {current['median_ns']} ns > {base['median_ns']} ns"
+            )
+    return {"ratios": ratios, "regressions": regressions}
+
+
+def format_diff(old: Dict[str, Any], new: Dict[str, Any]) -> str:
+    """Таблица медиан двух результатов и их отношения."""
+    lines = [f"{'benchmark':<56}{'old, ns':>12}{'new, ns':>12}{'ratio':>8}"]
+    old_benchmarks = old["benchmarks"]
+    for name, current in new["benchmarks"].items():
+        base = old_benchmarks.get(name)
+        if base is None:
+            lines.append(f"{name:<56}{'-':>12}{current['median_ns']:>12}")
+            continue
+        ratio = current["median_ns"] / base["median_ns"]
+        lines.append(
+            f"{name:<56}{base['median_ns']:>12}{current['median_ns']:>12}"
+            + f"{ratio:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Выполняет выбранные бенчмарки и возвращает результат."""
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if args.filter and not any(part in name for part in args.filter):
+            continue
+        results[name] = run_benchmark(factory(), args.repeat, args.min_time)
+        print(f"{name}: {results[name]['median_ns']} ns", file=sys.stderr)
+    return {
+        "meta": {
+            "repeat": args.repeat,
+            "min_time": args.min_time,
+            **machine_info(),
+        },
+        "benchmarks": results,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(
+        description="Microbenchmarks of per-request functions"
+    )
+    parser.add_argument(
+        "--filter", action="append", default=[],
+        help="Run only benchmarks whose name contains this substring",
+    )
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument(
+        "--min-time", type=float, default=0.1,
+        help="Minimum duration of one sample, sec",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=None,
+        help="Write the JSON result to this file as well as stdout",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25,
+        help="Allowed relative slowdown against the baseline",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true",
+        help="Store the result as the new baseline",
+    )
+    parser.add_argument(
+        "--diff", nargs=2, type=Path, metavar=("OLD", "NEW"),
+        help="Print a table comparing two saved results and exit",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.diff:
+        old, new = (json.loads(path.read_text()) for path in args.diff)
+        print(format_diff(old, new))
+        return 0
+
+    result = run(args)
+    regressions: List[str] = []
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(result, indent=2) + "\n")
+    elif args.baseline.exists():
+        comparison = compare(
+            result, json.loads(args.baseline.read_text()), args.tolerance
+        )
+        regressions = comparison["regressions"]
+        result["comparison"] = {
+            "baseline": str(args.baseline),
+            "tolerance": args.tolerance,
+            **comparison,
+        }
+
+    output = json.dumps(result, indent=2)
+    if args.output is not None:
+        args.output.write_text(output + "\n")
+    print(output)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,29 @@
 """
 Основной стартующий файл.
 """
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.openapi.utils import get_openapi
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 
 from app.api.routes.auth import user_router
-from app.api.routes.currency import currency_router
+from app.api.routes.currency import DATA_AGE_HEADER, currency_router
+from app.api.routes.metrics import metrics_router
 from app.core.config import settings, API_TITLE, API_VERSION, API_DESCRIPTION
 from app.core.log_config import init_loggers
+from app.core.metrics import MetricsMiddleware, mark_process_dead
 from app.core.middleware import ExceptionHandlerMiddleware
+from app.core.responses import FastJSONResponse
+from app.core.startup import StartupTimer
+from app.db.database import dispose_engine, init_engine
+from app.utils.executor import hashing_executor
+from app.utils.external_api import CurrencyAPI
+from app.utils.http_client import create_http_client
+from app.utils.providers.factory import create_rate_provider
+from app.utils.refresher import RatesRefresher
+from app.utils.shared_rates import create_rates_store
 
 
 class FastAPIApp:
@@ -19,15 +32,72 @@ class FastAPIApp:
     def __init__(self) -> None:
         """
         ### Инициализирует экземпляр `FastAPIApp`.
-            Импортирует промежуточные обработчики запросов, роуты,
-            и документацию в приложение
+            Импортирует промежуточные обработчики запросов и роуты
+            в приложение. Ответы по умолчанию сериализуются
+            `FastJSONResponse`. Схема OpenAPI строится при первом
+            запросе документации, а при `OPENAPI_ENABLED=False`
+            документация не подключается. Длительность этапов
+            запуска собирается в `startup`
         """
-        init_loggers()
+        self.startup = StartupTimer()
+        with self.startup.phase("loggers"):
+            init_loggers()
 
-        self.app: FastAPI = FastAPI()
-        self.include_middlewares()
-        self.include_routers()
-        self.include_openapi()
+        with self.startup.phase("app"):
+            self.app: FastAPI = FastAPI(
+                title=API_TITLE,
+                version=API_VERSION,
+                description=API_DESCRIPTION,
+                openapi_url=(
+                    "/openapi.json" if settings.OPENAPI_ENABLED else None
+                ),
+                lifespan=self.lifespan,
+                default_response_class=FastJSONResponse,
+            )
+        with self.startup.phase("middlewares"):
+            self.include_middlewares()
+        with self.startup.phase("routers"):
+            self.include_routers()
+
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI) -> AsyncIterator[None]:
+        """
+        ### Управляет ресурсами, которые живут всё время работы приложения.
+            Создает движок БД, общий HTTP клиент с пулом соединений
+            к сторонним сервисам и поставщика курсов валют, запускает
+            фоновое обновление курсов и освобождает ресурсы при остановке.
+            Метрики-индикаторы остановленного воркера удаляются из общей
+            суммы. Когда ресурсы готовы, пишет отчет о времени запуска.
+            Если задан `CURRENCY_SNAPSHOT_PATH`, кэши сразу заполняются
+            последним снимком курсов из общего файла.
+        """
+        with self.startup.phase("engine"):
+            init_engine()
+        with self.startup.phase("http_client"):
+            app.state.http_client = create_http_client()
+            app.state.rate_provider = create_rate_provider(
+                client=app.state.http_client
+            )
+        with self.startup.phase("refresher"):
+            rates_store = create_rates_store()
+            refresher = RatesRefresher(
+                currency_api=CurrencyAPI(provider=app.state.rate_provider),
+                store=rates_store,
+            )
+            refresher.load_shared()
+            if settings.CURRENCY_REFRESH_ENABLED:
+                refresher.start()
+        self.startup.report()
+        try:
+            yield
+        finally:
+            await refresher.stop()
+            if rates_store is not None:
+                rates_store.release()
+            await app.state.http_client.aclose()
+            await dispose_engine()
+            hashing_executor.shutdown()
+            mark_process_dead()
 
     def include_middlewares(self) -> None:
         """
@@ -41,6 +111,7 @@ class FastAPIApp:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=[DATA_AGE_HEADER],
             max_age=self.MAX_AGE_CORS,
             # Максимальное время (в секундах), в течение которого браузер
             # может кэшировать результаты предварительных запросов
@@ -50,6 +121,9 @@ class FastAPIApp:
             middleware_class=TrustedHostMiddleware,
             allowed_hosts=settings.ALLOWED_HOSTS.split(),
         )
+        # Добавляется последним, чтобы время обработки учитывало
+        # все остальные промежуточные обработчики
+        self.app.add_middleware(middleware_class=MetricsMiddleware)
 
     def include_routers(self) -> None:
         """
@@ -57,20 +131,10 @@ class FastAPIApp:
         """
         self.app.include_router(user_router, prefix="/api")
         self.app.include_router(currency_router, prefix="/api")
-
-    def include_openapi(self) -> None:
-        """
-        ### Настраивает документацию
-        """
-        if self.app.openapi_schema:
-            self.app.openapi = app.openapi_schema
-        else:
-            self.app.openapi_schema = get_openapi(
-                title=API_TITLE,
-                version=API_VERSION,
-                description=API_DESCRIPTION,
-                routes=self.app.routes,
-            )
+        # Метрики раскрывают внутреннее устройство сервиса, поэтому без
+        # токена доступа маршрут не подключается
+        if settings.METRICS_TOKEN:
+            self.app.include_router(metrics_router)
 
 
 def create_app() -> FastAPI: